@@ -18,6 +18,8 @@ import shutil
 from datetime import datetime, timedelta
 import logging
 import csv
+import re
+from io import BytesIO
 from pathlib import Path
 import pandas as pd
 from openpyxl import load_workbook
@@ -81,6 +83,11 @@ processing_sessions = {}
 # Template path configuration
 UW_TEMPLATE_PATH = "../Hardwell_UW_Example deal 1.xlsx"
 
+# T12 line items extract_t12_directly categorizes (matched against lower-cased labels)
+T12_KEY_LINE_PATTERN = re.compile(
+    'total property rental income|total revenues|total operating expenses|net operating income'
+)
+
 # Models
 class ProcessingStatus(BaseModel):
     session_id: str
@@ -601,13 +608,24 @@ async def process_documents_with_uw_template(
 class SimpleUWFiller:
     """Simple UW template filler that works with real extracted data."""
     
-    def __init__(self, template_path, processed_data, property_info):
+    def __init__(self, template_path, processed_data=None, property_info=None):
         self.template_path = template_path
         self.processed_data = processed_data
         self.property_info = property_info
+        self._template_bytes = None  # Template file contents, read on first use
     
-    def create_uw_package(self):
-        """Create UW package with real extracted data."""
+    def create_uw_package(self, processed_data=None, property_info=None):
+        """
+        Create UW package with real extracted data.
+        
+        Pass processed_data/property_info to reuse one filler across several deals;
+        the template file is only read from disk once per filler.
+        """
+        if processed_data is not None:
+            self.processed_data = processed_data
+        if property_info is not None:
+            self.property_info = property_info
+        
         try:
             logger.info("🎯 Creating Simple UW Package with Real Data...")
             logger.info(f"🎯 Template path: {self.template_path}")
@@ -622,7 +640,10 @@ class SimpleUWFiller:
             
             # Load template
             logger.info("🎯 Loading Excel template...")
-            wb = load_workbook(self.template_path)
+            if self._template_bytes is None:
+                with open(self.template_path, 'rb') as f:
+                    self._template_bytes = f.read()
+            wb = load_workbook(BytesIO(self._template_bytes))
             logger.info(f"🎯 Available sheets: {wb.sheetnames}")
             
             if 'UW' not in wb.sheetnames:
@@ -637,8 +658,10 @@ class SimpleUWFiller:
             self.fill_with_real_data(ws, rent_roll_data, t12_data)
             
             # Save
+            # Property name in the file name so deals filled in the same second don't collide
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_path = f"outputs/Real_UW_Package_{timestamp}.xlsx"
+            property_slug = re.sub(r'\W+', '_', self.property_info.property_name).strip('_')
+            output_path = f"outputs/Real_UW_Package_{property_slug}_{timestamp}.xlsx"
             logger.info(f"🎯 Saving to: {output_path}")
             
             os.makedirs("outputs", exist_ok=True)
@@ -743,42 +766,31 @@ def extract_rent_roll_directly(rent_roll_df):
         if df.iloc[0, 0] == 'Unit #':
             df = df.iloc[1:].reset_index(drop=True)
         
-        # Extract key columns (based on actual CSV structure)
-        units = []
-        total_monthly_rent = 0
-        occupied_units = 0
+        # Skip empty rows
+        first_col = df.iloc[:, 0]
+        df = df[first_col.notna() & (first_col.astype(str).str.strip() != '')]
+        num_columns = df.shape[1]
         
-        for _, row in df.iterrows():
-            try:
-                # Skip empty rows
-                if pd.isna(row.iloc[0]) or str(row.iloc[0]).strip() == '':
-                    continue
-                
-                unit_number = str(row.iloc[1]) if len(row) > 1 else str(row.iloc[0])
-                unit_type = str(row.iloc[2]) if len(row) > 2 else ""
-                
-                # Extract rent (column 5 in the CSV)
-                rent_str = str(row.iloc[5]) if len(row) > 5 else "0"
-                rent = 0
-                if rent_str and rent_str != 'nan':
-                    # Clean rent string: remove $, commas
-                    rent_clean = rent_str.replace('$', '').replace(',', '').strip()
-                    try:
-                        rent = float(rent_clean)
-                        if rent > 0:
-                            occupied_units += 1
-                            total_monthly_rent += rent
-                    except:
-                        pass
-                
-                units.append({
-                    'unit': unit_number,
-                    'type': unit_type,
-                    'rent': rent
-                })
-                
-            except Exception as e:
-                continue
+        # Extract key columns (based on actual CSV structure) column-wise
+        unit_numbers = df.iloc[:, 1 if num_columns > 1 else 0].astype(str)
+        unit_types = df.iloc[:, 2].astype(str) if num_columns > 2 else pd.Series('', index=df.index)
+        
+        # Extract rent (column 5 in the CSV): remove $, commas; unparseable rents count as 0
+        if num_columns > 5:
+            rent_clean = df.iloc[:, 5].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+            rents = pd.to_numeric(rent_clean.str.strip(), errors='coerce').fillna(0.0)
+        else:
+            rents = pd.Series(0.0, index=df.index)
+        
+        occupied = rents > 0
+        occupied_units = int(occupied.sum())
+        total_monthly_rent = float(rents[occupied].sum())
+        
+        units = pd.DataFrame({
+            'unit': unit_numbers.to_numpy(),
+            'type': unit_types.to_numpy(),
+            'rent': rents.to_numpy()
+        }).to_dict('records')
         
         total_units = len(units)
         avg_rent = total_monthly_rent / occupied_units if occupied_units > 0 else 0
@@ -815,35 +827,35 @@ def extract_t12_directly(t12_df):
         total_expenses = 0
         noi = 0
         
+        # Only rows naming a key financial line need the ordered categorization below
+        line_items = df.iloc[:, 0].astype(str).str.lower().where(df.iloc[:, 0].notna(), "")
+        is_key_line = line_items.str.contains(T12_KEY_LINE_PATTERN).to_numpy()
+        line_items = line_items[is_key_line]
+        
+        # Get T12 value (last column typically) for just those rows, cleaned and converted column-wise
+        if df.shape[1] > 1:
+            value_clean = (df.iloc[:, -1][is_key_line].astype(str)
+                           .str.replace('$', '', regex=False)
+                           .str.replace(',', '', regex=False)
+                           .str.replace('(', '-', regex=False)
+                           .str.replace(')', '', regex=False)
+                           .str.strip())
+            values = pd.to_numeric(value_clean, errors='coerce').astype(float)
+        else:
+            values = pd.Series(0.0, index=line_items.index)
+        key_rows = values.notna()
+        
         # Look for key financial lines
-        for _, row in df.iterrows():
-            try:
-                line_item = str(row.iloc[0]).lower() if not pd.isna(row.iloc[0]) else ""
-                
-                # Get T12 value (last column typically)
-                t12_value_str = str(row.iloc[-1]) if len(row) > 1 else "0"
-                
-                # Clean and convert to number
-                if t12_value_str and t12_value_str != 'nan':
-                    value_clean = t12_value_str.replace('$', '').replace(',', '').replace('(', '-').replace(')', '').strip()
-                    try:
-                        value = float(value_clean)
-                        
-                        # Categorize line items
-                        if 'total property rental income' in line_item:
-                            total_revenue = value
-                        elif 'total revenues' in line_item and total_revenue == 0:
-                            total_revenue = value
-                        elif 'total operating expenses' in line_item:
-                            total_expenses = value
-                        elif 'net operating income' in line_item:
-                            noi = value
-                            
-                    except:
-                        continue
-                        
-            except Exception as e:
-                continue
+        for line_item, value in zip(line_items[key_rows], values[key_rows].tolist()):
+            # Categorize line items
+            if 'total property rental income' in line_item:
+                total_revenue = value
+            elif 'total revenues' in line_item and total_revenue == 0:
+                total_revenue = value
+            elif 'total operating expenses' in line_item:
+                total_expenses = value
+            elif 'net operating income' in line_item:
+                noi = value
         
         # Calculate NOI if not found directly
         if noi == 0 and total_revenue > 0 and total_expenses > 0:
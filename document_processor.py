@@ -8,17 +8,37 @@ from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 import numpy as np
 
+# PyMuPDF (MuPDF C engine) - optional fast backend for text and table extraction
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
 class DocumentProcessor:
     """
     Advanced PDF document processor for extracting tables from multifamily real estate documents.
     Supports multiple extraction methods for different PDF formats and table structures.
     """
     
-    def __init__(self, debug=False):
-        """Initialize the document processor with logging configuration."""
+    def __init__(self, debug=False, pdf_backend='multi'):
+        """
+        Initialize the document processor with logging configuration.
+        
+        Args:
+            debug: Enable debug logging
+            pdf_backend: 'multi' (default) to run pdfplumber, camelot and tabula and keep
+                the best-scoring tables, or 'pymupdf' to opt in to PyMuPDF's faster parser
+                (falls back to the other methods only when it finds no tables)
+        """
         self.debug = debug
         self.setup_logging()
         
+        if pdf_backend == 'pymupdf' and not PYMUPDF_AVAILABLE:
+            self.logger.warning("PyMuPDF not installed - using multi-method extraction")
+            pdf_backend = 'multi'
+        self.pdf_backend = pdf_backend
+        
         # Document type classification patterns
         self.doc_patterns = {
             'rent_roll': [
@@ -54,25 +74,31 @@ class DocumentProcessor:
             Document type: 'rent_roll', 't12', 'offering_memorandum', or 'unknown'
         """
         try:
-            with pdfplumber.open(file_path) as pdf:
-                # Extract text from first few pages for classification
-                text = ""
-                for page_num in range(min(3, len(pdf.pages))):
-                    text += pdf.pages[page_num].extract_text() or ""
-                
-                text = text.lower()
-                
-                # Score each document type based on keyword matches
-                scores = {}
-                for doc_type, patterns in self.doc_patterns.items():
-                    score = sum(len(re.findall(pattern, text)) for pattern in patterns)
-                    scores[doc_type] = score
-                
-                # Return the document type with highest score
-                if max(scores.values()) > 0:
-                    return max(scores, key=scores.get)
-                else:
-                    return 'unknown'
+            # Extract text from first few pages for classification
+            text = ""
+            if self.pdf_backend == 'pymupdf':
+                with fitz.open(file_path) as doc:
+                    for page_num in range(min(3, doc.page_count)):
+                        text += doc[page_num].get_text()
+            else:
+                with pdfplumber.open(file_path) as pdf:
+                    for page in pdf.pages[:3]:
+                        text += page.extract_text() or ""
+                        page.close()  # Drop the page's cached layout objects
+            
+            text = text.lower()
+            
+            # Score each document type based on keyword matches
+            scores = {}
+            for doc_type, patterns in self.doc_patterns.items():
+                score = sum(len(re.findall(pattern, text)) for pattern in patterns)
+                scores[doc_type] = score
+            
+            # Return the document type with highest score
+            if max(scores.values()) > 0:
+                return max(scores, key=scores.get)
+            else:
+                return 'unknown'
                     
         except Exception as e:
             self.logger.error(f"Error classifying document {file_path}: {str(e)}")
@@ -90,6 +116,13 @@ class DocumentProcessor:
         """
         results = {}
         
+        # Opt-in fast path: PyMuPDF's C table finder; only fall back when it finds nothing.
+        # Its column layout can differ from the pdfplumber/camelot output the extractors expect
+        if self.pdf_backend == 'pymupdf':
+            results['pymupdf'] = self._extract_with_pymupdf(file_path)
+            if results['pymupdf']:
+                return results
+        
         # Method 1: pdfplumber (best for simple tables)
         results['pdfplumber'] = self._extract_with_pdfplumber(file_path)
         
@@ -101,6 +134,28 @@ class DocumentProcessor:
         
         return results
     
+    def _extract_with_pymupdf(self, file_path: str) -> List[pd.DataFrame]:
+        """Extract tables using PyMuPDF."""
+        tables = []
+        try:
+            with fitz.open(file_path) as doc:
+                for page_num, page in enumerate(doc):
+                    for table_num, table in enumerate(page.find_tables().tables):
+                        rows = table.extract()
+                        if rows and len(rows) > 1:  # Ensure table has data
+                            df = pd.DataFrame(rows[1:], columns=rows[0])
+                            df = self._clean_dataframe(df)
+                            if not df.empty:
+                                df.attrs['page'] = page_num + 1
+                                df.attrs['table'] = table_num + 1
+                                df.attrs['method'] = 'pymupdf'
+                                tables.append(df)
+                                
+        except Exception as e:
+            self.logger.error(f"PyMuPDF extraction failed for {file_path}: {str(e)}")
+            
+        return tables
+    
     def _extract_with_pdfplumber(self, file_path: str) -> List[pd.DataFrame]:
         """Extract tables using pdfplumber."""
         tables = []
@@ -108,6 +163,8 @@ class DocumentProcessor:
             with pdfplumber.open(file_path) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     page_tables = page.extract_tables()
+                    # Free the page's cached layout objects so memory stays flat on long rent rolls
+                    page.close()
                     for table_num, table in enumerate(page_tables):
                         if table and len(table) > 1:  # Ensure table has data
                             df = pd.DataFrame(table[1:], columns=table[0])
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Disk cache for document extraction results, keyed by the source file's content.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+CACHE_DIR = Path(".cache/docproc")
+
+# Bump when the extraction or cleaning code changes what gets cached
+CACHE_VERSION = 1
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_extract(path, fn, tag, should_cache=bool):
+    """
+    Return fn(path), reusing a pickled result keyed by the file's content hash.
+
+    tag names the configuration that produced the result (e.g. the PDF backend) and
+    is part of the key along with fn's name and CACHE_VERSION. Results for which
+    should_cache is false (failed or empty extractions) are returned but not stored.
+    Entries are written atomically; a truncated or corrupt entry counts as a miss.
+    """
+    cache_path = CACHE_DIR / f"{file_digest(path)}-{fn.__name__}-{tag}-v{CACHE_VERSION}.pkl"
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (EOFError, pickle.UnpicklingError):
+            # Left behind by an interrupted write - drop it and re-extract
+            cache_path.unlink(missing_ok=True)
+
+    result = fn(path)
+    if should_cache(result):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Dump to a temp file in the same directory and rename it into place, so a
+        # reader never sees a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return result
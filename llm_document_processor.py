@@ -14,6 +14,13 @@ import requests
 import time
 import re
 
+# PyMuPDF (MuPDF C engine) - opt-in fast backend for text and table extraction
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,7 +28,17 @@ logger = logging.getLogger(__name__)
 class LLMDocumentProcessor:
     """Enhanced document processor using LLM for intelligent data extraction."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, pdf_backend: str = 'pdfplumber'):
+        """
+        Args:
+            api_key: Together AI key (defaults to TOGETHER_API_KEY)
+            pdf_backend: 'pdfplumber' (default) for the text and tables the prompts were written
+                against, or 'pymupdf' to opt in to PyMuPDF's faster parser
+        """
+        if pdf_backend == 'pymupdf' and not PYMUPDF_AVAILABLE:
+            logger.warning("PyMuPDF not installed - using pdfplumber")
+            pdf_backend = 'pdfplumber'
+        self.pdf_backend = pdf_backend
         self.api_key = api_key or os.getenv('TOGETHER_API_KEY') or "749cb5d3e0bfc6c1afac8c3abe0b46194118317f5e6cbbef49b84a761448fc39"
         
         # Initialize Together client
@@ -39,11 +56,13 @@ class LLMDocumentProcessor:
         """Extract all possible data from PDF using multiple methods."""
         logger.info(f"🔍 Extracting all data from: {file_path}")
         
-        # Extract using multiple methods
+        # Extract using multiple methods; the LLM pass reuses the same text and tables
+        raw_text = self._extract_raw_text(file_path)
+        tables = self._extract_tables(file_path)
         extracted_data = {
-            'raw_text': self._extract_raw_text(file_path),
-            'tables': self._extract_tables(file_path),
-            'structured_data': self._extract_structured_data(file_path)
+            'raw_text': raw_text,
+            'tables': tables,
+            'structured_data': self._extract_structured_data(file_path, raw_text, tables)
         }
         
         return extracted_data
@@ -51,11 +70,16 @@ class LLMDocumentProcessor:
     def _extract_raw_text(self, file_path: str) -> str:
         """Extract raw text from PDF."""
         try:
+            if self.pdf_backend == 'pymupdf':
+                with fitz.open(file_path) as doc:
+                    return "".join(page.get_text() + "\n" for page in doc)
+            
             import pdfplumber
             text = ""
             with pdfplumber.open(file_path) as pdf:
                 for page in pdf.pages:
                     text += page.extract_text() + "\n"
+                    page.close()  # Drop the page's cached layout objects
             return text
         except Exception as e:
             logger.error(f"Text extraction failed: {e}")
@@ -65,31 +89,45 @@ class LLMDocumentProcessor:
         """Extract tables from PDF."""
         tables = []
         try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_tables = page.extract_tables()
-                    for table_num, table in enumerate(page_tables):
-                        if table and len(table) > 1:
-                            # Convert to DataFrame for easier handling
-                            df = pd.DataFrame(table[1:], columns=table[0])
-                            tables.append({
-                                'page': page_num + 1,
-                                'table_num': table_num + 1,
-                                'data': df.to_dict('records'),
-                                'columns': df.columns.tolist()
-                            })
+            if self.pdf_backend == 'pymupdf':
+                with fitz.open(file_path) as doc:
+                    page_tables = [
+                        (page_num, [table.extract() for table in page.find_tables().tables])
+                        for page_num, page in enumerate(doc)
+                    ]
+            else:
+                import pdfplumber
+                with pdfplumber.open(file_path) as pdf:
+                    page_tables = []
+                    for page_num, page in enumerate(pdf.pages):
+                        page_tables.append((page_num, page.extract_tables()))
+                        page.close()  # Drop the page's cached layout objects
+            
+            for page_num, page_table_list in page_tables:
+                for table_num, table in enumerate(page_table_list):
+                    if table and len(table) > 1:
+                        # Convert to DataFrame for easier handling
+                        df = pd.DataFrame(table[1:], columns=table[0])
+                        tables.append({
+                            'page': page_num + 1,
+                            'table_num': table_num + 1,
+                            'data': df.to_dict('records'),
+                            'columns': df.columns.tolist()
+                        })
         except Exception as e:
             logger.error(f"Table extraction failed: {e}")
         
         return tables
     
-    def _extract_structured_data(self, file_path: str) -> Dict:
+    def _extract_structured_data(self, file_path: str, raw_text: Optional[str] = None,
+                                 tables: Optional[List[Dict]] = None) -> Dict:
         """Extract structured data using LLM."""
         try:
-            # Get raw text and tables
-            raw_text = self._extract_raw_text(file_path)
-            tables = self._extract_tables(file_path)
+            # Get raw text and tables (unless the caller already extracted them)
+            if raw_text is None:
+                raw_text = self._extract_raw_text(file_path)
+            if tables is None:
+                tables = self._extract_tables(file_path)
             
             # Prepare data for LLM - use full text but chunk it intelligently
             combined_data = {
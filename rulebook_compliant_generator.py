@@ -5,16 +5,60 @@ This system STRICTLY follows the Hardwell Capital Underwriting Rulebook
 """
 
 import os
+import re
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from document_processor import DocumentProcessor
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import xlsxwriter
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
 import logging
 
+# Shared workbook cell formats (registered once per workbook, reused by every cell)
+WORKBOOK_FORMATS = {
+    'header': {'bold': True, 'font_size': 12, 'font_color': '#FFFFFF', 'bg_color': '#366092', 'pattern': 1},
+    'data': {'font_size': 10},
+    'data_amount': {'font_size': 10, 'num_format': '#,##0'},
+    'data_decimal': {'font_size': 10, 'num_format': '0.00'},
+    'data_percent': {'font_size': 10, 'num_format': '0.0%'},
+    'bold': {'bold': True},
+    'bold_amount': {'bold': True, 'num_format': '#,##0'},
+    'bold_percent': {'bold': True, 'num_format': '0.0%'},
+    'italic': {'italic': True}
+}
+
+# Summary PDF layout, resolved once at import: (font, size) and baseline positions in points
+PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT = letter
+PDF_TITLE_FONT = ('Helvetica-Bold', 18)
+PDF_BODY_FONT = ('Helvetica', 10)
+PDF_TITLE_Y = PDF_PAGE_HEIGHT - 72
+PDF_BODY_X = 72
+PDF_BODY_Y = PDF_PAGE_HEIGHT - 120
+PDF_LINE_HEIGHT = 14
+
+# Output file buffer - 1 MiB instead of the 8 KiB default for xlsx/pdf writes
+BUF_SIZE = 1 << 20
+
+@dataclass(frozen=True, slots=True)
+class PropertyContext:
+    """Immutable snapshot of the property attributes the expense rules depend on."""
+    total_units: int = 86
+    property_age: int = 25
+    transaction_type: str = 'refinance'
+
+    @classmethod
+    def from_property_info(cls, property_info):
+        """Resolve attributes (with rulebook defaults) from a property_info object once."""
+        return cls(
+            total_units=getattr(property_info, 'total_units', 86),
+            property_age=getattr(property_info, 'property_age', 25),
+            transaction_type=getattr(property_info, 'transaction_type', 'refinance')
+        )
+
 class RulebookCompliantGenerator:
     """Generator that STRICTLY follows the Hardwell Capital Underwriting Rulebook."""
     
@@ -62,6 +106,13 @@ class RulebookCompliantGenerator:
             'replacement_reserves': 250,  # Always $250/unit
             'minimum_expense_ratio': 0.28  # Must be at least 28% of EGI
         }
+        
+        # Property tax (multiplier, note) by transaction type
+        tax_adjustments = self.rulebook_config['property_tax_adjustments']
+        self._tax_adjustments = {
+            'refinance': (tax_adjustments['refinance'], "Increased by 7.5% for refinance per rulebook"),
+            'acquisition': (tax_adjustments['acquisition'], "Acquisition - using actuals")  # Would use millage rate calculation
+        }
     
     def generate_compliant_package(self, rent_roll_path, t12_path, property_info):
         """Generate underwriting package that STRICTLY follows the rulebook."""
@@ -69,6 +120,9 @@ class RulebookCompliantGenerator:
         print("🚀 Generating RULEBOOK COMPLIANT Underwriting Package...")
         print("=" * 80)
         
+        ctx = PropertyContext.from_property_info(property_info)
+        run_id = self._output_run_id(property_info)
+        
         # Step 1: Extract Raw Data
         print("📊 Extracting Raw Data...")
         rent_roll_data = self._extract_rent_roll(rent_roll_path)
@@ -80,7 +134,7 @@ class RulebookCompliantGenerator:
         
         # Step 3: Apply Expense Rules (Rulebook Section: EXPENSE RULES)
         print("💸 Applying Expense Rules...")
-        expense_analysis = self._apply_expense_rules(t12_data, income_analysis, property_info)
+        expense_analysis = self._apply_expense_rules(t12_data, income_analysis, ctx)
         
         # Step 4: Calculate NOI and Validate
         print("📈 Calculating NOI and Validating...")
@@ -89,11 +143,11 @@ class RulebookCompliantGenerator:
         # Step 5: Generate Required Tabs
         print("📊 Generating Required Output Tabs...")
         excel_path = self._create_compliant_excel(rent_roll_data, t12_data, income_analysis, 
-                                                 expense_analysis, noi_analysis, property_info)
+                                                 expense_analysis, noi_analysis, property_info, run_id)
         
         # Step 6: Generate PDF
         print("📄 Generating PDF Package...")
-        pdf_path = self._create_compliant_pdf(excel_path, noi_analysis)
+        pdf_path = self._create_compliant_pdf(excel_path, noi_analysis, run_id)
         
         return {
             'excel_path': excel_path,
@@ -104,6 +158,15 @@ class RulebookCompliantGenerator:
             'compliance_report': self._generate_compliance_report(income_analysis, expense_analysis, noi_analysis)
         }
     
+    def _output_run_id(self, property_info):
+        """Name component shared by this run's output files: property name slug + timestamp.
+        
+        Including the property keeps parallel batch runs from overwriting each other's files.
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', getattr(property_info, 'property_name', '')).strip('_')
+        return f"{slug}_{timestamp}" if slug else timestamp
+    
     def _extract_rent_roll(self, rent_roll_path):
         """Extract rent roll following rulebook INPUT DOCUMENTS rules."""
         
@@ -114,33 +177,37 @@ class RulebookCompliantGenerator:
             raise ValueError("Failed to extract rent roll data")
         
         # Clean according to rulebook: "Strip all unnecessary columns (deposits, tenant names, balances owed)"
-        cleaned_data = []
-        for idx, row in rent_roll_df.iterrows():
-            if idx == 0:  # Skip header
-                continue
-                
-            unit_number = str(row.iloc[0]).strip()
-            if not unit_number or unit_number == 'nan' or 'Unit' in unit_number:
-                continue
-            
-            # Extract only necessary data per rulebook
-            unit_type = str(row.iloc[2]).strip()
-            square_feet = self._safe_float(row.iloc[3], 1187)  # Default if missing
-            current_rent = self._safe_float(row.iloc[5], 0)
-            
-            # Determine occupancy (keep tenant name only for this purpose, then strip)
-            tenant_name = str(row.iloc[4]).strip()
-            is_occupied = tenant_name and tenant_name != 'nan'
-            
-            cleaned_data.append({
-                'Unit_Number': unit_number,
-                'Unit_Type': unit_type,
-                'Square_Feet': square_feet,
-                'Current_Rent': current_rent,
-                'Is_Occupied': is_occupied
-            })
-        
-        rent_roll_df = pd.DataFrame(cleaned_data)
+        body = rent_roll_df[rent_roll_df.index != 0]  # Skip header
+
+        unit_number_col = body.iloc[:, 0].astype(str).str.strip()
+        keep = ((unit_number_col != '') & (unit_number_col != 'nan') &
+                ~unit_number_col.str.contains('Unit', regex=False)).to_numpy()
+        body = body[keep]
+
+        # Extract only necessary data per rulebook, one column array per field
+        unit_numbers = unit_number_col.to_numpy()[keep]
+        unit_types = body.iloc[:, 2].astype(str).str.strip().to_numpy()
+        square_feet = self._safe_float_series(body.iloc[:, 3], 1187).to_numpy()  # Default if missing
+        current_rent = self._safe_float_series(body.iloc[:, 5], 0).to_numpy()
+
+        # Determine occupancy (keep tenant name only for this purpose, then strip)
+        tenant_names = body.iloc[:, 4].astype(str).str.strip()
+        is_occupied = ((tenant_names != '') & (tenant_names != 'nan')).to_numpy()
+
+        rent_roll_df = pd.DataFrame({
+            'Unit_Number': unit_numbers,
+            'Unit_Type': unit_types,
+            'Square_Feet': square_feet,
+            'Current_Rent': current_rent,
+            'Is_Occupied': is_occupied
+        })
+
+        # Compact dtypes for the per-unit-type filtering/aggregation downstream.
+        # Current_Rent stays float64: its sums and means feed the dollar totals.
+        rent_roll_df['Square_Feet'] = pd.to_numeric(rent_roll_df['Square_Feet'], downcast='float')
+        rent_roll_df['Is_Occupied'] = rent_roll_df['Is_Occupied'].astype(bool)
+        rent_roll_df['Unit_Type'] = rent_roll_df['Unit_Type'].astype('category')
+
         print(f"   ✅ Extracted {len(rent_roll_df)} units (cleaned per rulebook)")
         
         return rent_roll_df
@@ -156,11 +223,10 @@ class RulebookCompliantGenerator:
         
         # Extract financial metrics - CUT OFF AT NOI per rulebook
         financial_data = {}
+        row_texts = t12_df.iloc[:, 0].astype(str).str.strip().str.upper()
+        amounts = self._safe_float_series(t12_df.iloc[:, -1], 0)
         
-        for idx, row in t12_df.iterrows():
-            row_text = str(row.iloc[0]).strip().upper()
-            amount = self._safe_float(row.iloc[-1], 0)
-            
+        for row_text, amount in zip(row_texts, amounts):
             # Map T12 line items (only above NOI per rulebook)
             if 'GROSS POTENTIAL RENT' in row_text:
                 financial_data['gross_potential_rents'] = amount
@@ -231,15 +297,15 @@ class RulebookCompliantGenerator:
             'rent_analysis': rent_analysis
         }
     
-    def _apply_expense_rules(self, t12_data, income_analysis, property_info):
+    def _apply_expense_rules(self, t12_data, income_analysis, ctx):
         """Apply EXPENSE RULES section of rulebook."""
         
         print("   💸 Applying Expense Rules per Rulebook...")
         
         gross_potential_income = income_analysis['gross_potential_income']
-        total_units = getattr(property_info, 'total_units', 86)
-        property_age = getattr(property_info, 'property_age', 25)
-        transaction_type = getattr(property_info, 'transaction_type', 'refinance')
+        total_units = ctx.total_units
+        property_age = ctx.property_age
+        transaction_type = ctx.transaction_type
         
         # VACANCY: "Use 5% of Gross Potential Income or actuals (whichever is higher)"
         actual_vacancy = gross_potential_income - income_analysis['total_rental_income']
@@ -251,12 +317,8 @@ class RulebookCompliantGenerator:
         
         # PROPERTY TAXES: Apply rulebook adjustment
         actual_property_taxes = t12_data.get('property_taxes', 0)
-        if transaction_type == 'refinance':
-            property_taxes = actual_property_taxes * self.rulebook_config['property_tax_adjustments']['refinance']
-            tax_note = "Increased by 7.5% for refinance per rulebook"
-        else:
-            property_taxes = actual_property_taxes  # Would use millage rate calculation
-            tax_note = "Acquisition - using actuals"
+        tax_multiplier, tax_note = self._tax_adjustments.get(transaction_type, self._tax_adjustments['acquisition'])
+        property_taxes = actual_property_taxes * tax_multiplier
         
         # INSURANCE: "Increase actuals by 5%"
         actual_insurance = t12_data.get('insurance', 0)
@@ -295,15 +357,12 @@ class RulebookCompliantGenerator:
         
         # MINIMUM EXPENSE RATIO: "Total expenses must be at least 28% of EGI"
         minimum_expenses = effective_gross_income * self.rulebook_config['minimum_expense_ratio']
-        if total_expenses < minimum_expenses:
-            # Need to increase expenses to meet 28% minimum
-            shortage = minimum_expenses - total_expenses
-            # Add to professional fees first
-            professional_fees += shortage
-            total_expenses = minimum_expenses
-            expense_ratio_note = "Increased to meet 28% minimum expense ratio"
-        else:
-            expense_ratio_note = "Meets minimum expense ratio requirement"
+        # Any shortage against the 28% minimum is added to professional fees first
+        shortage = max(minimum_expenses - total_expenses, 0)
+        professional_fees += shortage
+        total_expenses = max(total_expenses, minimum_expenses)
+        expense_ratio_note = ("Increased to meet 28% minimum expense ratio" if shortage
+                              else "Meets minimum expense ratio requirement")
         
         expense_ratio = total_expenses / effective_gross_income if effective_gross_income > 0 else 0
         
@@ -406,97 +465,78 @@ class RulebookCompliantGenerator:
         
         return analysis
     
-    def _create_compliant_excel(self, rent_roll_data, t12_data, income_analysis, expense_analysis, noi_analysis, property_info):
+    def _create_compliant_excel(self, rent_roll_data, t12_data, income_analysis, expense_analysis, noi_analysis, property_info, run_id):
         """Create Excel package with exact tabs required by rulebook."""
         
-        wb = Workbook()
-        wb.remove(wb.active)
+        excel_path = f"outputs/Rulebook_Compliant_Package_{run_id}.xlsx"
+        os.makedirs("outputs", exist_ok=True)
         
-        # Define professional styles
-        header_font = Font(bold=True, size=12, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        data_font = Font(size=10)
+        with open(excel_path, 'wb', buffering=BUF_SIZE) as excel_file:
+            # constant_memory streams each finished row to disk instead of holding the sheet in RAM
+            wb = xlsxwriter.Workbook(excel_file, {'constant_memory': True, 'nan_inf_to_errors': True})
+            formats = {name: wb.add_format(props) for name, props in WORKBOOK_FORMATS.items()}
         
-        # TAB 1: Clean Rent Roll (per rulebook)
-        self._create_clean_rent_roll_tab(wb, rent_roll_data, income_analysis, header_font, header_fill, data_font)
+            # TAB 1: Clean Rent Roll (per rulebook)
+            self._create_clean_rent_roll_tab(wb, rent_roll_data, income_analysis, formats)
         
-        # TAB 2: Clean T12 (cut off at NOI per rulebook)
-        self._create_clean_t12_tab(wb, t12_data, noi_analysis, header_font, header_fill, data_font)
+            # TAB 2: Clean T12 (cut off at NOI per rulebook)
+            self._create_clean_t12_tab(wb, t12_data, noi_analysis, formats)
         
-        # TAB 3: Underwriting Summary (exact columns per rulebook)
-        self._create_underwriting_summary_tab(wb, income_analysis, expense_analysis, noi_analysis, header_font, header_fill, data_font)
+            # TAB 3: Underwriting Summary (exact columns per rulebook)
+            self._create_underwriting_summary_tab(wb, income_analysis, expense_analysis, noi_analysis, formats)
         
-        # Save workbook
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        excel_path = f"outputs/Rulebook_Compliant_Package_{timestamp}.xlsx"
-        os.makedirs("outputs", exist_ok=True)
-        wb.save(excel_path)
+            # Save workbook (flushes the zip into the buffered file)
+            wb.close()
         
         print(f"   ✅ Excel package created: {excel_path}")
         return excel_path
     
-    def _create_clean_rent_roll_tab(self, wb, rent_roll_data, income_analysis, header_font, header_fill, data_font):
+    def _create_clean_rent_roll_tab(self, wb, rent_roll_data, income_analysis, formats):
         """Create Clean Rent Roll tab per rulebook requirements."""
         
-        ws = wb.create_sheet("Clean Rent Roll")
+        ws = wb.add_worksheet("Clean Rent Roll")
+        ws.set_column(0, 6, 12)
         
         # Headers
         headers = ['Unit #', 'Unit Type', 'Sq Ft', 'Current Rent', 'Status', 'Annual Rent', 'Rent/SF']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
+        ws.write_row(0, 0, headers, formats['header'])
         
-        # Data
-        row = 2
+        # Data (rows are 0-based in xlsxwriter)
+        row = 1
         for _, unit in rent_roll_data.iterrows():
-            ws.cell(row=row, column=1, value=unit['Unit_Number'])
-            ws.cell(row=row, column=2, value=unit['Unit_Type'])
-            ws.cell(row=row, column=3, value=unit['Square_Feet'])
-            ws.cell(row=row, column=4, value=unit['Current_Rent'])
-            ws.cell(row=row, column=5, value='Occupied' if unit['Is_Occupied'] else 'Vacant')
-            ws.cell(row=row, column=6, value=unit['Current_Rent'] * 12)
-            ws.cell(row=row, column=7, value=unit['Current_Rent'] / unit['Square_Feet'] if unit['Square_Feet'] > 0 else 0)
-            
-            # Apply formatting
-            for col in range(1, 8):
-                ws.cell(row=row, column=col).font = data_font
-            
-            # Number formatting
-            ws.cell(row=row, column=4).number_format = '#,##0'
-            ws.cell(row=row, column=6).number_format = '#,##0'
-            ws.cell(row=row, column=7).number_format = '0.00'
-            
+            ws.write(row, 0, unit['Unit_Number'], formats['data'])
+            ws.write(row, 1, unit['Unit_Type'], formats['data'])
+            ws.write(row, 2, unit['Square_Feet'], formats['data'])
+            ws.write(row, 3, unit['Current_Rent'], formats['data_amount'])
+            ws.write(row, 4, 'Occupied' if unit['Is_Occupied'] else 'Vacant', formats['data'])
+            ws.write(row, 5, unit['Current_Rent'] * 12, formats['data_amount'])
+            ws.write(row, 6, unit['Current_Rent'] / unit['Square_Feet'] if unit['Square_Feet'] > 0 else 0,
+                     formats['data_decimal'])
             row += 1
         
         # Add rent analysis summary
         row += 2
-        ws.cell(row=row, column=1, value="RENT ANALYSIS").font = Font(bold=True)
+        ws.write(row, 0, "RENT ANALYSIS", formats['bold'])
         row += 1
         
         for unit_type, analysis in income_analysis['rent_analysis'].items():
-            ws.cell(row=row, column=1, value=f"{unit_type}:")
-            ws.cell(row=row, column=2, value=f"Avg Rent: ${analysis['average_rent']:,.0f}")
-            ws.cell(row=row, column=3, value=f"Rent/SF: ${analysis['rent_per_sqft']:.2f}")
+            ws.write(row, 0, f"{unit_type}:")
+            ws.write(row, 1, f"Avg Rent: ${analysis['average_rent']:,.0f}")
+            ws.write(row, 2, f"Rent/SF: ${analysis['rent_per_sqft']:.2f}")
             if analysis['underpriced_units']:
-                ws.cell(row=row, column=4, value=f"Underpriced: {', '.join(analysis['underpriced_units'])}")
+                ws.write(row, 3, f"Underpriced: {', '.join(analysis['underpriced_units'])}")
             row += 1
-        
-        # Adjust column widths
-        for col in range(1, 8):
-            ws.column_dimensions[get_column_letter(col)].width = 12
     
-    def _create_clean_t12_tab(self, wb, t12_data, noi_analysis, header_font, header_fill, data_font):
+    def _create_clean_t12_tab(self, wb, t12_data, noi_analysis, formats):
         """Create Clean T12 tab (cut off at NOI per rulebook)."""
         
-        ws = wb.create_sheet("Clean T12")
+        ws = wb.add_worksheet("Clean T12")
+        ws.set_column(0, 0, 25)
+        ws.set_column(1, 1, 15)
         
         # Headers
         headers = ['Line Item', 'Annual Amount']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
+        ws.write_row(0, 0, headers, formats['header'])
         
         # T12 data (cut off at NOI per rulebook)
         t12_items = [
@@ -514,44 +554,36 @@ class RulebookCompliantGenerator:
             ('NET OPERATING INCOME', t12_data.get('net_operating_income', 0))
         ]
         
-        row = 2
+        row = 1
         for item_name, amount in t12_items:
-            ws.cell(row=row, column=1, value=item_name)
-            if isinstance(amount, (int, float)) and amount != '':
-                ws.cell(row=row, column=2, value=amount)
-                ws.cell(row=row, column=2).number_format = '#,##0'
-            else:
-                ws.cell(row=row, column=2, value=amount)
-            
             # Bold formatting for headers
-            if item_name in ['OPERATING EXPENSES', 'NET OPERATING INCOME']:
-                ws.cell(row=row, column=1).font = Font(bold=True)
-                ws.cell(row=row, column=2).font = Font(bold=True)
+            is_heading = item_name in ['OPERATING EXPENSES', 'NET OPERATING INCOME']
+            text_format = formats['bold'] if is_heading else formats['data']
+            
+            ws.write(row, 0, item_name, text_format)
+            if isinstance(amount, (int, float)) and amount != '':
+                ws.write(row, 1, amount, formats['bold_amount'] if is_heading else formats['data_amount'])
             else:
-                ws.cell(row=row, column=1).font = data_font
-                ws.cell(row=row, column=2).font = data_font
+                ws.write(row, 1, amount, text_format)
             
             row += 1
         
         # Note about cutting off at NOI
         row += 1
-        ws.cell(row=row, column=1, value="Note: Cut off at NOI per rulebook").font = Font(italic=True)
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 15
+        ws.write(row, 0, "Note: Cut off at NOI per rulebook", formats['italic'])
     
-    def _create_underwriting_summary_tab(self, wb, income_analysis, expense_analysis, noi_analysis, header_font, header_fill, data_font):
+    def _create_underwriting_summary_tab(self, wb, income_analysis, expense_analysis, noi_analysis, formats):
         """Create Underwriting Summary with exact columns per rulebook."""
         
-        ws = wb.create_sheet("Underwriting Summary")
+        ws = wb.add_worksheet("Underwriting Summary")
+        ws.set_column(0, 0, 25)
+        ws.set_column(1, 1, 15)
+        ws.set_column(2, 2, 12)
+        ws.set_column(3, 3, 40)
         
         # Headers per rulebook: "Line Item, $ Amount, % of EGI, Notes"
         headers = ['Line Item', '$ Amount', '% of EGI', 'Notes']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
+        ws.write_row(0, 0, headers, formats['header'])
         
         egi = expense_analysis['effective_gross_income']
         
@@ -588,59 +620,47 @@ class RulebookCompliantGenerator:
              noi_analysis['net_operating_income'] / egi, 'Calculated per rulebook')
         ]
         
-        row = 2
+        row = 1
         for item in summary_items:
-            ws.cell(row=row, column=1, value=item[0])
+            # Bold formatting for section headers
+            is_heading = item[0] in ['INCOME', 'OPERATING EXPENSES', 'NET OPERATING INCOME']
+            text_format = formats['bold'] if is_heading else formats['data']
+            
+            ws.write(row, 0, item[0], text_format)
             
             if isinstance(item[1], (int, float)) and item[1] != '':
-                ws.cell(row=row, column=2, value=item[1])
-                ws.cell(row=row, column=2).number_format = '#,##0'
+                ws.write(row, 1, item[1], formats['bold_amount'] if is_heading else formats['data_amount'])
             else:
-                ws.cell(row=row, column=2, value=item[1])
+                ws.write(row, 1, item[1], text_format)
             
             if isinstance(item[2], (int, float)) and item[2] != '':
-                ws.cell(row=row, column=3, value=item[2])
-                ws.cell(row=row, column=3).number_format = '0.0%'
+                ws.write(row, 2, item[2], formats['bold_percent'] if is_heading else formats['data_percent'])
             else:
-                ws.cell(row=row, column=3, value=item[2])
+                ws.write(row, 2, item[2], text_format)
             
-            ws.cell(row=row, column=4, value=item[3])
-            
-            # Bold formatting for section headers
-            if item[0] in ['INCOME', 'OPERATING EXPENSES', 'NET OPERATING INCOME']:
-                for col in range(1, 5):
-                    ws.cell(row=row, column=col).font = Font(bold=True)
-            else:
-                for col in range(1, 5):
-                    ws.cell(row=row, column=col).font = data_font
+            ws.write(row, 3, item[3], text_format)
             
             row += 1
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 40
     
-    def _create_compliant_pdf(self, excel_path, noi_analysis):
+    def _create_compliant_pdf(self, excel_path, noi_analysis, run_id):
         """Create PDF package."""
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        pdf_path = f"outputs/Rulebook_Compliant_Summary_{timestamp}.pdf"
         
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        story.append(Paragraph("RULEBOOK COMPLIANT UNDERWRITING ANALYSIS", styles['Title']))
-        story.append(Spacer(1, 20))
-        story.append(Paragraph(f"Net Operating Income: ${noi_analysis['net_operating_income']:,.0f}", styles['Normal']))
-        story.append(Paragraph(f"Expense Ratio: {noi_analysis['expense_ratio']:.1%}", styles['Normal']))
-        
-        doc.build(story)
+        pdf_path = f"outputs/Rulebook_Compliant_Summary_{run_id}.pdf"
+        
+        # Single fixed-layout page - draw directly instead of running Platypus layout
+        with open(pdf_path, 'wb', buffering=BUF_SIZE) as pdf_file:
+            pdf = canvas.Canvas(pdf_file, pagesize=letter)
+            pdf.setFont(*PDF_TITLE_FONT)
+            pdf.drawCentredString(PDF_PAGE_WIDTH / 2, PDF_TITLE_Y, "RULEBOOK COMPLIANT UNDERWRITING ANALYSIS")
+            pdf.setFont(*PDF_BODY_FONT)
+            body_lines = (
+                f"Net Operating Income: ${noi_analysis['net_operating_income']:,.0f}",
+                f"Expense Ratio: {noi_analysis['expense_ratio']:.1%}"
+            )
+            for i, line in enumerate(body_lines):
+                pdf.drawString(PDF_BODY_X, PDF_BODY_Y - i * PDF_LINE_HEIGHT, line)
+            pdf.showPage()
+            pdf.save()
         print(f"   ✅ PDF created: {pdf_path}")
         return pdf_path
     
@@ -673,28 +693,46 @@ class RulebookCompliantGenerator:
             ]
         }
     
-    def _safe_float(self, value, default=0):
-        """Safely convert value to float."""
-        if pd.isna(value):
-            return default
-        try:
-            if isinstance(value, str):
-                value = value.replace('$', '').replace(',', '').strip()
-            return float(value) if value and str(value) != 'nan' else default
-        except:
-            return default
+    def _safe_float_series(self, values, default=0):
+        """Strip '$' and ',' and coerce a column to float in one vectorized pass, missing -> default."""
+        cleaned = values.astype(str).str.replace(r'[$,]', '', regex=True).str.strip()
+        return pd.to_numeric(cleaned, errors='coerce').fillna(default).astype(float)
+
+class PropertyInfo:
+    """Property details for one underwriting run (module level so batch jobs can be pickled)."""
+    def __init__(self, property_name="Bolden Heights Apartments",
+                 property_address="3350 Mount Gilead Road, Atlanta, GA 30311",
+                 transaction_type="refinance", property_age=25, total_units=86):
+        self.property_name = property_name
+        self.property_address = property_address
+        self.transaction_type = transaction_type
+        self.property_age = property_age  # Affects R&M minimums
+        self.total_units = total_units
+
+def _run_one(rent_roll_path, t12_path, property_info, debug=False):
+    """Generate one property's package (top-level so it can run in a worker process)."""
+    generator = RulebookCompliantGenerator(debug=debug)
+    return generator.generate_compliant_package(rent_roll_path, t12_path, property_info)
+
+def generate_packages_batch(jobs, max_workers=None, debug=False):
+    """Generate packages for many properties in parallel worker processes.
+    
+    jobs: iterable of (rent_roll_path, t12_path, property_info). Only paths and the small
+    property record cross the process boundary. Yields (property_info, results, error)
+    as each job finishes; exactly one of results/error is None.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_one, rent_roll_path, t12_path, property_info, debug): property_info
+            for rent_roll_path, t12_path, property_info in jobs
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
 
 def main():
     """Main function to run the rulebook compliant generator."""
     
-    class PropertyInfo:
-        def __init__(self):
-            self.property_name = "Bolden Heights Apartments"
-            self.property_address = "3350 Mount Gilead Road, Atlanta, GA 30311"
-            self.transaction_type = "refinance"
-            self.property_age = 25  # Affects R&M minimums
-            self.total_units = 86
-    
     property_info = PropertyInfo()
     
     # File paths
@@ -702,11 +740,9 @@ def main():
     rent_roll_path = f"{test_dir}/rent_roll/RR_3350_Mount_Gilead_Rd_Atlanta_GA_30311.pdf"
     t12_path = f"{test_dir}/t12/T12_3350_Mount_Gilead_Rd_Atlanta_GA_30311.pdf"
     
-    # Generate rulebook compliant package
-    generator = RulebookCompliantGenerator(debug=True)
-    
+    # Generate rulebook compliant package (in-process; use generate_packages_batch for many properties)
     try:
-        results = generator.generate_compliant_package(rent_roll_path, t12_path, property_info)
+        results = _run_one(rent_roll_path, t12_path, property_info, debug=True)
         
         print(f"\n✅ RULEBOOK COMPLIANT package generated successfully!")
         print(f"   📊 Excel: {results['excel_path']}")
@@ -726,4 +762,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,34 +3,36 @@
 Run the Enhanced Underwriting Application
 """
 
-import subprocess
-import sys
+import runpy
 import os
 
 def main():
     print("🚀 Starting Enhanced Real Estate Underwriting Application")
     print("=" * 60)
     
+    # Stat every required path once up front
+    uw_template_path = "../Hardwell_UW_Example deal 1.xlsx"
+    app_path = "app_demo_enhanced.py"
+    index_path = "templates/index.html"
+    missing = {path: not os.path.exists(path) for path in (app_path, uw_template_path, index_path)}
+    
     # Check if we're in the right directory
-    if not os.path.exists("app_demo_enhanced.py"):
+    if missing[app_path]:
         print("❌ app_demo_enhanced.py not found in current directory")
         print("📁 Make sure you're in the hardwell directory")
         return
     
     # Check if UW template exists
-    uw_template_path = "../Hardwell_UW_Example deal 1.xlsx"
-    if os.path.exists(uw_template_path):
-        print("✅ UW Template found")
-    else:
+    if missing[uw_template_path]:
         print("⚠️ UW Template not found - UW template generation will be disabled")
+    else:
+        print("✅ UW Template found")
     
-    # Check if static directory exists
-    if not os.path.exists("static"):
-        print("📁 Creating static directory...")
-        os.makedirs("static", exist_ok=True)
+    # Ensure static directory exists (exist_ok avoids a separate existence check)
+    os.makedirs("static", exist_ok=True)
     
     # Check if templates directory exists
-    if not os.path.exists("templates/index.html"):
+    if missing[index_path]:
         print("❌ templates/index.html not found")
         return
     
@@ -47,14 +49,15 @@ def main():
     print("=" * 60)
     
     try:
-        # Run the enhanced application
-        subprocess.run([sys.executable, "app_demo_enhanced.py"], check=True)
+        # Run the enhanced application in this interpreter (no second Python start-up)
+        runpy.run_path(app_path, run_name="__main__")
     except KeyboardInterrupt:
         print("\n👋 Server stopped")
-    except subprocess.CalledProcessError as e:
+    except SystemExit as e:
+        if e.code:
+            print(f"❌ Error running application: exit status {e.code}")
+    except Exception as e:
         print(f"❌ Error running application: {e}")
-    except FileNotFoundError:
-        print("❌ Python not found. Make sure Python is installed and in PATH")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,7 +5,10 @@ Uses the successful rulebook_compliant_generator.py data extraction
 """
 
 import os
+import re
+import numpy as np
 import pandas as pd
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from openpyxl import load_workbook
@@ -16,101 +19,183 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Excel number formats - values are written as numbers so the template can sum them.
+# Applied via cell.number_format: openpyxl interns each format string once per workbook,
+# so styles.xml gets one numFmt entry per format. A NamedStyle would not be cheaper and
+# would reset the template's own font/border/alignment on every cell it touched.
+CURRENCY_FMT = '"$"#,##0'
+NUMBER_FMT = '#,##0'
+PCT_FMT = '0.0%'
+
+# Output file buffer - 1 MiB instead of the 8 KiB default for the zipped xlsx write
+BUF_SIZE = 1 << 20
+
+# Template column letters -> 1-based column indexes for ws.cell()
+COL_IDX = {letter: index for index, letter in enumerate('ABCDEFGHIJKLMNOP', start=1)}
+
+# Shared fill for vacant unit rows (one style object reused for every cell)
+VACANT_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+
+# T-12 line items we overwrite, in match priority order:
+# line item -> tokens that must all appear in the uppercased column A label
+T12_LINE_TOKENS = {
+    'gross_potential_rents': ('GROSS POTENTIAL RENT',),
+    'vacancy_loss': ('VACANCY LOSS',),
+    'total_rental_income': ('TOTAL PROPERTY RENTAL INCOME',),
+    'total_other_income': ('TOTAL OTHER INCOME',),
+    'property_taxes': ('PROPERTY TAXES',),
+    'insurance': ('INSURANCE', 'TOTAL'),
+    'utilities': ('TOTAL UTILITIES',),
+    'maintenance_repairs': ('MAINTENANCE', 'REPAIR'),
+    'management_fees': ('MANAGEMENT FEE',),
+    'net_operating_income': ('NET OPERATING INCOME',)
+}
+
+# All line items folded into one compiled alternation: each branch is a named group of
+# lookaheads (one per token), tried left to right at the start of the label, so
+# match.lastgroup is the first line item in T12_LINE_TOKENS order whose tokens all appear
+T12_LINE_PATTERN = re.compile(
+    '|'.join(
+        f"(?P<{line_item}>{''.join(f'(?=.*{re.escape(token)})' for token in tokens)})"
+        for line_item, tokens in T12_LINE_TOKENS.items()
+    ),
+    re.DOTALL
+)
+
+# Shortest label that could satisfy any line item (every token of that item must fit);
+# shorter sub-category labels ("Gas", "Trash", ...) skip the regex entirely
+T12_MIN_LABEL_LEN = min(max(len(token) for token in tokens) for tokens in T12_LINE_TOKENS.values())
+
+@dataclass(slots=True)
+class FinancialRecord:
+    """Rulebook-adjusted annual financials for one property, one field per figure."""
+    # Income
+    gross_potential_rents: float
+    total_other_income: float
+    gross_potential_income: float
+    vacancy_loss: float
+    effective_gross_income: float
+    total_rental_income: float
+    # Expenses
+    property_taxes: float
+    insurance: float
+    utilities: float
+    maintenance_repairs: float
+    management_fees: float
+    professional_fees: float
+    replacement_reserves: float
+    total_expenses: float
+    expense_ratio: float
+    # NOI
+    net_operating_income: float
+    noi_margin: float
+
+def get_property_info():
+    """Property details shown in the template headers."""
+    return {
+        'name': 'Bolden Heights Apartments',
+        'address': '3350 Mount Gilead Road, Atlanta, GA 30311',
+        'total_units': 86,
+        'occupied_units': 66,
+        'vacant_units': 20,
+        'property_age': 25
+    }
+
 def extract_financial_data():
     """Extract financial data using our successful approach."""
     
     # Use the data we successfully extracted from our rulebook compliant generator
     # Based on the terminal output, we know these values work:
     
-    financial_data = {
-        'property_info': {
-            'name': 'Bolden Heights Apartments',
-            'address': '3350 Mount Gilead Road, Atlanta, GA 30311',
-            'total_units': 86,
-            'occupied_units': 66,
-            'vacant_units': 20,
-            'property_age': 25
-        },
-        'income_data': {
-            'gross_potential_rents': 1596020,
-            'total_other_income': 128017,
-            'gross_potential_income': 1724037,  # 1596020 + 128017
-            'vacancy_loss': 86202,  # 5% of GPI (minimum per rulebook)
-            'effective_gross_income': 1637835,  # GPI - Vacancy
-            'total_rental_income': 1512178  # From rent roll
-        },
-        'expense_data': {
-            'property_taxes': 75389,  # 70129 * 1.075 (7.5% increase for refinance)
-            'insurance': 22680,  # 21600 * 1.05 (5% increase)
-            'utilities': 130598,  # 128037 * 1.02 (2% increase)
-            'maintenance_repairs': 60200,  # Age-based minimum: 86 units * $700/unit (25-year property)
-            'management_fees': 68953,  # Tier-based: 4% of GPI for this income level
-            'professional_fees': 5000,  # Minimum required
-            'replacement_reserves': 21500,  # 86 units * $250/unit
-            'total_expenses': 384320,
-            'expense_ratio': 0.235  # 23.5% of EGI
-        },
-        'noi_data': {
-            'net_operating_income': 1253515,  # EGI - Total Expenses
-            'noi_margin': 0.765  # 76.5%
-        }
-    }
+    record = FinancialRecord(
+        gross_potential_rents=1596020,
+        total_other_income=128017,
+        gross_potential_income=1724037,  # 1596020 + 128017
+        vacancy_loss=86202,  # 5% of GPI (minimum per rulebook)
+        effective_gross_income=1637835,  # GPI - Vacancy
+        total_rental_income=1512178,  # From rent roll
+        property_taxes=75389,  # 70129 * 1.075 (7.5% increase for refinance)
+        insurance=22680,  # 21600 * 1.05 (5% increase)
+        utilities=130598,  # 128037 * 1.02 (2% increase)
+        maintenance_repairs=60200,  # Age-based minimum: 86 units * $700/unit (25-year property)
+        management_fees=68953,  # Tier-based: 4% of GPI for this income level
+        professional_fees=5000,  # Minimum required
+        replacement_reserves=21500,  # 86 units * $250/unit
+        total_expenses=384320,
+        expense_ratio=0.235,  # 23.5% of EGI
+        net_operating_income=1253515,  # EGI - Total Expenses
+        noi_margin=0.765  # 76.5%
+    )
     
-    # Ensure minimum 28% expense ratio per rulebook
-    min_expenses = financial_data['income_data']['effective_gross_income'] * 0.28
-    if financial_data['expense_data']['total_expenses'] < min_expenses:
-        shortage = min_expenses - financial_data['expense_data']['total_expenses']
-        financial_data['expense_data']['professional_fees'] += shortage
-        financial_data['expense_data']['total_expenses'] = min_expenses
-        financial_data['expense_data']['expense_ratio'] = 0.28
-        financial_data['noi_data']['net_operating_income'] = (
-            financial_data['income_data']['effective_gross_income'] - min_expenses
-        )
+    # Ensure minimum 28% expense ratio per rulebook (shortage goes to professional fees).
+    # np.maximum keeps this branchless and works unchanged on per-property arrays.
+    min_expenses = record.effective_gross_income * 0.28
+    record.professional_fees += float(np.maximum(0.0, min_expenses - record.total_expenses))
+    record.total_expenses = float(np.maximum(record.total_expenses, min_expenses))
+    record.expense_ratio = record.total_expenses / record.effective_gross_income
+    record.net_operating_income = record.effective_gross_income - record.total_expenses
     
-    return financial_data
+    return record
 
 def create_rent_roll_data():
     """Create simplified rent roll data for template."""
     
-    rent_roll_data = []
-    
     # Sample data based on extraction results (86 units, 66 occupied, 20 vacant)
-    unit_types = [
-        {"type": "2 Bed / 1.5 Bath", "sqft": 1187, "count": 70, "avg_rent": 1525},
-        {"type": "2 Bed / 1.5 Bath", "sqft": 1205, "count": 13, "avg_rent": 1595},
-        {"type": "3 Bed / 1.5 Bath", "sqft": 1805, "count": 3, "avg_rent": 1795}
-    ]
+    type_names = np.array(["2 Bed / 1.5 Bath", "2 Bed / 1.5 Bath", "3 Bed / 1.5 Bath"], dtype=object)
+    type_sqft = np.array([1187, 1205, 1805])
+    type_counts = np.array([70, 13, 3])
+    type_avg_rents = np.array([1525, 1595, 1795])
     
-    unit_number = 1
-    for unit_type in unit_types:
-        for i in range(unit_type["count"]):
-            # 77% occupancy rate (66/86)
-            is_occupied = (i < int(unit_type["count"] * 0.77))
-            
-            rent_roll_data.append({
-                'Unit_Number': unit_number,
-                'Unit_ID': f"A-{unit_number:02d}",
-                'Unit_Type': unit_type["type"],
-                'Square_Feet': unit_type["sqft"],
-                'Current_Rent': unit_type["avg_rent"] if is_occupied else 0,
-                'Is_Occupied': is_occupied,
-                'Tenant_Name': f"Tenant {unit_number}" if is_occupied else "VACANT",
-                'Water_Fees': 65 if is_occupied else 0,
-                'Pest_Trash_Fees': 15 if is_occupied else 0,
-                'Lease_Term': "12-Month" if is_occupied else ""
-            })
-            unit_number += 1
+    # 77% occupancy rate (66/86): the first int(count * 0.77) units of each type are occupied
+    total_units = type_counts.sum()
+    position_in_type = np.arange(total_units) - np.repeat(np.cumsum(type_counts) - type_counts, type_counts)
+    is_occupied = position_in_type < np.repeat((type_counts * 0.77).astype(int), type_counts)
     
-    return pd.DataFrame(rent_roll_data)
+    unit_numbers = np.arange(1, total_units + 1)
+    unit_number_text = pd.Series(unit_numbers).astype(str)
+    
+    return pd.DataFrame({
+        'Unit_Number': unit_numbers,
+        'Unit_ID': 'A-' + unit_number_text.str.zfill(2),
+        'Unit_Type': np.repeat(type_names, type_counts),
+        'Square_Feet': np.repeat(type_sqft, type_counts),
+        'Current_Rent': np.where(is_occupied, np.repeat(type_avg_rents, type_counts), 0),
+        'Is_Occupied': is_occupied,
+        'Tenant_Name': ('Tenant ' + unit_number_text).where(is_occupied, "VACANT"),
+        'Water_Fees': np.where(is_occupied, 65, 0),
+        'Pest_Trash_Fees': np.where(is_occupied, 15, 0),
+        'Lease_Term': np.where(is_occupied, "12-Month", "").astype(object)
+    })
+
+def write_number(ws, row, column, value, number_format):
+    """Write a numeric value and its display format to a single cell."""
+    ws.cell(row=row, column=column, value=value).number_format = number_format
+
+def scan_t12_labels(ws_t12, max_row=59):
+    """Lazily yield (row, UPPERCASE label) for the T-12 column A labels.
+    
+    Rows are read on demand, so a caller that stops at NOI never reads the rest.
+    """
+    rows = ws_t12.iter_rows(min_row=1, max_row=max_row, max_col=1, values_only=True)
+    for row, (cell_value,) in enumerate(rows, start=1):
+        if cell_value:
+            yield row, str(cell_value).upper()
+
+def match_t12_line_item(label):
+    """Return the T12_LINE_TOKENS key matching an uppercased label, or None."""
+    match = T12_LINE_PATTERN.match(label)
+    return match.lastgroup if match else None
 
 def fill_existing_template(template_path, output_name="Filled_Template"):
     """Fill the existing Excel template with our data."""
     
     logger.info("🚀 Filling Existing Excel Template...")
     logger.info("=" * 60)
+    now = datetime.now()
     
     # Extract our financial data
     logger.info("📊 Preparing financial data...")
+    property_info = get_property_info()
     financial_data = extract_financial_data()
     rent_roll_df = create_rent_roll_data()
     
@@ -124,9 +209,9 @@ def fill_existing_template(template_path, output_name="Filled_Template"):
         ws_rr = wb['Rent Roll']
         
         # Update header information
-        ws_rr['A1'] = financial_data['property_info']['name']
-        ws_rr['A2'] = financial_data['property_info']['address']
-        ws_rr['A3'] = datetime.now().strftime('%B %d, %Y')
+        ws_rr.cell(row=1, column=COL_IDX['A'], value=property_info['name'])
+        ws_rr.cell(row=2, column=COL_IDX['A'], value=property_info['address'])
+        ws_rr.cell(row=3, column=COL_IDX['A'], value=now.strftime('%B %d, %Y'))
         
         # Update unit mix summary (rows 8-11)
         unit_summary = [
@@ -137,35 +222,45 @@ def fill_existing_template(template_path, output_name="Filled_Template"):
         
         for i, unit_info in enumerate(unit_summary):
             row = 8 + i
-            ws_rr[f'C{row}'] = unit_info["units"]
-            ws_rr[f'D{row}'] = unit_info["type"]
-            ws_rr[f'E{row}'] = f"${unit_info['sqft']:,}"
-            ws_rr[f'F{row}'] = f"${unit_info['units'] * unit_info['sqft']:,}"
-            ws_rr[f'G{row}'] = f"${unit_info['market_rent']:,}"
-            ws_rr[f'H{row}'] = f"${unit_info['units'] * unit_info['market_rent']:,}"
-            ws_rr[f'I{row}'] = f"${unit_info['units'] * unit_info['market_rent'] * 12:,}"
+            ws_rr.cell(row=row, column=COL_IDX['C'], value=unit_info["units"])
+            ws_rr.cell(row=row, column=COL_IDX['D'], value=unit_info["type"])
+            write_number(ws_rr, row, COL_IDX['E'], unit_info['sqft'], NUMBER_FMT)
+            write_number(ws_rr, row, COL_IDX['F'], unit_info['units'] * unit_info['sqft'], NUMBER_FMT)
+            write_number(ws_rr, row, COL_IDX['G'], unit_info['market_rent'], CURRENCY_FMT)
+            write_number(ws_rr, row, COL_IDX['H'], unit_info['units'] * unit_info['market_rent'], CURRENCY_FMT)
+            write_number(ws_rr, row, COL_IDX['I'], unit_info['units'] * unit_info['market_rent'] * 12, CURRENCY_FMT)
         
         # Update detailed rent roll starting at row 14
-        for idx, unit in rent_roll_df.iterrows():
-            row = 14 + idx
-            if row > 100:  # Limit to reasonable range
-                break
-                
-            ws_rr[f'A{row}'] = unit['Unit_Number']
-            ws_rr[f'B{row}'] = unit['Unit_ID']
-            ws_rr[f'C{row}'] = unit['Unit_Type']
-            ws_rr[f'D{row}'] = f"${unit['Square_Feet']:,}"
-            ws_rr[f'E{row}'] = unit['Tenant_Name']
-            ws_rr[f'F{row}'] = f"${unit['Current_Rent']:,}" if unit['Current_Rent'] > 0 else "VACANT"
-            ws_rr[f'G{row}'] = unit['Water_Fees'] if unit['Is_Occupied'] else ""
-            ws_rr[f'H{row}'] = unit['Pest_Trash_Fees'] if unit['Is_Occupied'] else ""
-            ws_rr[f'I{row}'] = unit['Lease_Term']
+        unit_numbers = rent_roll_df['Unit_Number'].to_numpy()
+        unit_ids = rent_roll_df['Unit_ID'].to_numpy()
+        unit_types = rent_roll_df['Unit_Type'].to_numpy()
+        square_feet = rent_roll_df['Square_Feet'].to_numpy()
+        tenant_names = rent_roll_df['Tenant_Name'].to_numpy()
+        current_rents = rent_roll_df['Current_Rent'].to_numpy()
+        is_occupied = rent_roll_df['Is_Occupied'].to_numpy()
+        water_fees = rent_roll_df['Water_Fees'].to_numpy()
+        pest_trash_fees = rent_roll_df['Pest_Trash_Fees'].to_numpy()
+        lease_terms = rent_roll_df['Lease_Term'].to_numpy()
+        
+        for i in range(min(len(rent_roll_df), 87)):  # Limit to reasonable range (rows 14-100)
+            row = 14 + i
+            ws_rr.cell(row=row, column=COL_IDX['A'], value=unit_numbers[i])
+            ws_rr.cell(row=row, column=COL_IDX['B'], value=unit_ids[i])
+            ws_rr.cell(row=row, column=COL_IDX['C'], value=unit_types[i])
+            write_number(ws_rr, row, COL_IDX['D'], square_feet[i], NUMBER_FMT)
+            ws_rr.cell(row=row, column=COL_IDX['E'], value=tenant_names[i])
+            if current_rents[i] > 0:
+                write_number(ws_rr, row, COL_IDX['F'], current_rents[i], CURRENCY_FMT)
+            else:
+                ws_rr.cell(row=row, column=COL_IDX['F'], value="VACANT")
+            ws_rr.cell(row=row, column=COL_IDX['G'], value=water_fees[i] if is_occupied[i] else "")
+            ws_rr.cell(row=row, column=COL_IDX['H'], value=pest_trash_fees[i] if is_occupied[i] else "")
+            ws_rr.cell(row=row, column=COL_IDX['I'], value=lease_terms[i])
             
             # Highlight vacant units
-            if not unit['Is_Occupied']:
-                for col in ['E', 'F', 'G', 'H', 'I']:
-                    cell = ws_rr[f'{col}{row}']
-                    cell.fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+            if not is_occupied[i]:
+                for col in range(COL_IDX['E'], COL_IDX['I'] + 1):
+                    ws_rr.cell(row=row, column=col).fill = VACANT_FILL
         
         logger.info("   ✅ Rent Roll updated with 86 units")
     
@@ -175,96 +270,75 @@ def fill_existing_template(template_path, output_name="Filled_Template"):
         ws_t12 = wb['T-12']
         
         # Update header
-        ws_t12['A1'] = f"{financial_data['property_info']['name']} - UNDERWRITER ADJUSTED T12"
-        ws_t12['A2'] = financial_data['property_info']['address']
+        ws_t12.cell(row=1, column=COL_IDX['A'], value=f"{property_info['name']} - UNDERWRITER ADJUSTED T12")
+        ws_t12.cell(row=2, column=COL_IDX['A'], value=property_info['address'])
         
         # Find and update key financial rows with our rulebook-compliant values
+        t12_updates = {
+            'gross_potential_rents': (financial_data.gross_potential_rents, "From rent roll analysis"),
+            'vacancy_loss': (-financial_data.vacancy_loss, "5% minimum per rulebook"),
+            'total_rental_income': (financial_data.total_rental_income, "Adjusted for vacancy"),
+            'total_other_income': (financial_data.total_other_income, "From T12 actuals"),
+            'property_taxes': (financial_data.property_taxes, "Increased 7.5% for refinance"),
+            'insurance': (financial_data.insurance, "Increased 5% per rulebook"),
+            'utilities': (financial_data.utilities, "Increased 2% per rulebook"),
+            'maintenance_repairs': (financial_data.maintenance_repairs,
+                                    f"Age-based minimum: {property_info['property_age']} years"),
+            'management_fees': (financial_data.management_fees, "Tier-based calculation"),
+            'net_operating_income': (financial_data.net_operating_income, "Rulebook compliant NOI")
+        }
+        
         updates_made = 0
-        for row in range(1, 60):
-            cell_value = ws_t12[f'A{row}'].value
-            if cell_value:
-                cell_text = str(cell_value).upper()
+        for row, cell_text in scan_t12_labels(ws_t12):
+            if len(cell_text) < T12_MIN_LABEL_LEN:
+                continue
+            line_item = match_t12_line_item(cell_text)
+            if line_item is None:
+                continue
+            
+            # Update annual totals (column O) with our calculations
+            amount, note = t12_updates[line_item]
+            write_number(ws_t12, row, COL_IDX['O'], amount, CURRENCY_FMT)
+            ws_t12.cell(row=row, column=COL_IDX['P'], value=note)
+            updates_made += 1
+            
+            if line_item == 'net_operating_income':
+                # Add summary below NOI
+                ws_t12.cell(row=row+1, column=COL_IDX['A'], value="Expense Ratio")
+                write_number(ws_t12, row+1, COL_IDX['O'], financial_data.expense_ratio, PCT_FMT)
+                ws_t12.cell(row=row+1, column=COL_IDX['P'], value="Meets 28% minimum")
                 
-                # Update annual totals (column O) with our calculations
-                if 'GROSS POTENTIAL RENT' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['income_data']['gross_potential_rents']:,}"
-                    ws_t12[f'P{row}'] = "From rent roll analysis"
-                    updates_made += 1
-                    
-                elif 'VACANCY LOSS' in cell_text:
-                    ws_t12[f'O{row}'] = f"${-financial_data['income_data']['vacancy_loss']:,}"
-                    ws_t12[f'P{row}'] = "5% minimum per rulebook"
-                    updates_made += 1
-                    
-                elif 'TOTAL PROPERTY RENTAL INCOME' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['income_data']['total_rental_income']:,}"
-                    ws_t12[f'P{row}'] = "Adjusted for vacancy"
-                    updates_made += 1
-                    
-                elif 'TOTAL OTHER INCOME' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['income_data']['total_other_income']:,}"
-                    ws_t12[f'P{row}'] = "From T12 actuals"
-                    updates_made += 1
-                    
-                elif 'PROPERTY TAXES' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['expense_data']['property_taxes']:,}"
-                    ws_t12[f'P{row}'] = "Increased 7.5% for refinance"
-                    updates_made += 1
-                    
-                elif 'INSURANCE' in cell_text and 'TOTAL' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['expense_data']['insurance']:,}"
-                    ws_t12[f'P{row}'] = "Increased 5% per rulebook"
-                    updates_made += 1
-                    
-                elif 'TOTAL UTILITIES' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['expense_data']['utilities']:,}"
-                    ws_t12[f'P{row}'] = "Increased 2% per rulebook"
-                    updates_made += 1
-                    
-                elif 'MAINTENANCE' in cell_text and 'REPAIR' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['expense_data']['maintenance_repairs']:,}"
-                    ws_t12[f'P{row}'] = f"Age-based minimum: {financial_data['property_info']['property_age']} years"
-                    updates_made += 1
-                    
-                elif 'MANAGEMENT FEE' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['expense_data']['management_fees']:,}"
-                    ws_t12[f'P{row}'] = "Tier-based calculation"
-                    updates_made += 1
-                    
-                elif 'NET OPERATING INCOME' in cell_text:
-                    ws_t12[f'O{row}'] = f"${financial_data['noi_data']['net_operating_income']:,}"
-                    ws_t12[f'P{row}'] = "Rulebook compliant NOI"
-                    
-                    # Add summary below NOI
-                    ws_t12[f'A{row+1}'] = "Expense Ratio"
-                    ws_t12[f'O{row+1}'] = f"{financial_data['expense_data']['expense_ratio']:.1%}"
-                    ws_t12[f'P{row+1}'] = "Meets 28% minimum"
-                    
-                    ws_t12[f'A{row+2}'] = "NOI Margin"
-                    ws_t12[f'O{row+2}'] = f"{financial_data['noi_data']['noi_margin']:.1%}"
-                    ws_t12[f'P{row+2}'] = "Strong cash flow"
-                    
-                    updates_made += 3
-                    break  # Stop at NOI
-        
-        logger.info(f"   ✅ T-12 updated with {updates_made} line items")
+                ws_t12.cell(row=row+2, column=COL_IDX['A'], value="NOI Margin")
+                write_number(ws_t12, row+2, COL_IDX['O'], financial_data.noi_margin, PCT_FMT)
+                ws_t12.cell(row=row+2, column=COL_IDX['P'], value="Strong cash flow")
+                
+                updates_made += 2
+                break  # Stop at NOI
+    
+        logger.info("   ✅ T-12 updated with %d line items", updates_made)
     
     # Save the filled template
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
     output_path = f"outputs/{output_name}_{timestamp}.xlsx"
     os.makedirs("outputs", exist_ok=True)
-    wb.save(output_path)
+    with open(output_path, 'wb', buffering=BUF_SIZE) as output_file:
+        wb.save(output_file)
     
-    logger.info("\n✅ TEMPLATE FILLED SUCCESSFULLY!")
-    logger.info(f"   📊 Output: {output_path}")
-    logger.info(f"   🏠 Property: {financial_data['property_info']['name']}")
-    logger.info(f"   🏢 Units: {financial_data['property_info']['total_units']} ({financial_data['property_info']['occupied_units']} occupied)")
-    logger.info(f"   💰 NOI: ${financial_data['noi_data']['net_operating_income']:,}")
-    logger.info(f"   📈 Expense Ratio: {financial_data['expense_data']['expense_ratio']:.1%}")
-    logger.info(f"   📋 All rulebook rules applied!")
+    # Summary is only formatted when INFO is actually emitted
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n".join([
+            "\n✅ TEMPLATE FILLED SUCCESSFULLY!",
+            f"   📊 Output: {output_path}",
+            f"   🏠 Property: {property_info['name']}",
+            f"   🏢 Units: {property_info['total_units']} ({property_info['occupied_units']} occupied)",
+            f"   💰 NOI: ${financial_data.net_operating_income:,}",
+            f"   📈 Expense Ratio: {financial_data.expense_ratio:.1%}",
+            "   📋 All rulebook rules applied!"
+        ]))
     
     return {
         'output_path': output_path,
+        'property_info': property_info,
         'financial_data': financial_data,
         'rent_roll_data': rent_roll_df
     }
@@ -276,7 +350,7 @@ def main():
     template_path = "../Loan_Package_3350_Mount_Gilead_Rd_Atlanta_GA_30311_9_26_2024.xlsx"
     
     if not os.path.exists(template_path):
-        logger.error(f"❌ Template file not found: {template_path}")
+        logger.error("❌ Template file not found: %s", template_path)
         return
     
     try:
@@ -291,7 +365,7 @@ def main():
         logger.info("   ✅ Ready for underwriting review!")
         
     except Exception as e:
-        logger.error(f"❌ Error filling template: {str(e)}")
+        logger.error("❌ Error filling template: %s", e)
         import traceback
         traceback.print_exc()
 
@@ -5,46 +5,145 @@ Uses the existing Excel template and fills it with rulebook-compliant extracted
 """
 
 import os
+import re
+import functools
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from document_processor import DocumentProcessor
+from extraction_cache import cached_extract
 from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
+import xlsxwriter
 import logging
 
+# Template column letters -> 1-based column indexes for ws.cell()
+COL_IDX = {letter: index for index, letter in enumerate('ABCDEFGHIJKLMNOP', start=1)}
+
+# Shared fill for vacant unit rows (one style object reused for every cell)
+VACANT_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+
+# Currency symbols and thousands separators stripped before float conversion
+_MONEY_RE = re.compile(r'[$,]')
+
+# T-12 sheet header (the template's sheet is for the Mount Gilead property)
+T12_TITLE = "Bolden Heights Apartments - Trailing 12 Month Operating Financials (UNDERWRITER ADJUSTED)"
+T12_ADDRESS = "3350 Mount Gilead Road Atlanta, GA 30311"
+
+# Row labels for the T-12 sheet when it is written from scratch (xlsxwriter backend)
+T12_LINE_LABELS = {
+    'gross_potential_rents': 'Gross Potential Rent',
+    'vacancy_loss': 'Vacancy Loss',
+    'rental_income': 'Total Property Rental Income',
+    'other_income': 'Total Other Income',
+    'property_taxes': 'Property Taxes',
+    'insurance': 'Total Insurance',
+    'utilities': 'Total Utilities',
+    'maintenance_repairs': 'Repairs & Maintenance',
+    'management_fees': 'Management Fees',
+    'net_operating_income': 'Net Operating Income'
+}
+
+# T-12 line items, in match priority order:
+# financial_data key -> tokens that must all appear in the uppercased label
+T12_LINE_TOKENS = {
+    'gross_potential_rents': ('GROSS POTENTIAL RENT',),
+    'loss_to_lease': ('LOSS TO LEASE',),
+    'vacancy_loss': ('VACANCY LOSS',),
+    'rental_income': ('TOTAL PROPERTY RENTAL INCOME',),
+    'other_income': ('TOTAL OTHER INCOME',),
+    'property_taxes': ('PROPERTY TAXES',),
+    'insurance': ('INSURANCE', 'TOTAL'),
+    'utilities': ('TOTAL UTILITIES',),
+    'maintenance_repairs': ('MAINTENANCE', 'REPAIR'),
+    'management_fees': ('MANAGEMENT FEE',),
+    'net_operating_income': ('NET OPERATING INCOME',)
+}
+
+def compile_line_pattern(line_tokens):
+    """Fold a {line item: tokens} table into one compiled alternation.
+    
+    Each named group is a lookahead per token, tried in table order, so the group
+    that matches is the first line item whose tokens all appear in the label.
+    """
+    return re.compile(
+        '|'.join(
+            f"(?P<{line_item}>{''.join(f'(?=.*{re.escape(token)})' for token in tokens)})"
+            for line_item, tokens in line_tokens.items()
+        ),
+        re.DOTALL
+    )
+
+T12_LINE_PATTERN = compile_line_pattern(T12_LINE_TOKENS)
+
+# The template's T-12 sheet has no loss-to-lease line to overwrite
+T12_FILL_PATTERN = compile_line_pattern(
+    {line_item: tokens for line_item, tokens in T12_LINE_TOKENS.items() if line_item != 'loss_to_lease'}
+)
+
+# Rulebook configuration - built once at import and shared (read-only) by every generator
+RULEBOOK_CONFIG = MappingProxyType({
+    'vacancy_minimum': 0.05,  # 5% minimum
+    'property_tax_adjustments': {
+        'refinance': 1.075,  # +7.5% for refinance
+        'acquisition': 1.0
+    },
+    'insurance_adjustment': 1.05,  # +5%
+    'utilities_adjustment': 1.02,  # +2%
+    'rm_minimums_by_age': {
+        (0, 10): 500, (10, 20): 600, (20, 30): 700,
+        (30, 40): 800, (40, 50): 900, (50, 100): 1000
+    },
+    'rm_cap': 1500,  # Cap at $1,500/unit
+    'management_fee_tiers': [
+        (0, 500000, 0.05), (500000, 750000, 0.045),
+        (750000, 1000000, 0.04), (1000000, 1500000, 0.035),
+        (1500000, 2000000, 0.03), (2000000, float('inf'), 0.025)
+    ],
+    'professional_fees': {'minimum': 1000, 'maximum_per_unit': 400},
+    'replacement_reserves': 250,  # $250/unit
+    'minimum_expense_ratio': 0.28  # 28% minimum
+})
+
+# Tier lookup tables for np.searchsorted: lower edges and the rate for each band.
+# The trailing rate is the out-of-range fallback (index -1 below the first edge).
+_RM_AGE_EDGES = np.array([min_age for min_age, _ in RULEBOOK_CONFIG['rm_minimums_by_age']] +
+                         [max(max_age for _, max_age in RULEBOOK_CONFIG['rm_minimums_by_age'])])
+_RM_RATES = np.array(list(RULEBOOK_CONFIG['rm_minimums_by_age'].values()) + [1000])
+_MGMT_EDGES = np.array([min_income for min_income, _, _ in RULEBOOK_CONFIG['management_fee_tiers']])
+_MGMT_RATES = np.array([rate for _, _, rate in RULEBOOK_CONFIG['management_fee_tiers']])
+
+@functools.lru_cache(maxsize=2)
+def _get_processor(debug):
+    """
+    Shared DocumentProcessor per debug setting (it keeps no per-document state).
+    
+    The default multi-method backend can process documents concurrently; with
+    pdf_backend='pymupdf' it must only be used from one thread at a time.
+    """
+    return DocumentProcessor(debug=debug)
+
 class TemplateBasedGenerator:
     """Generator that uses existing Excel template and fills with extracted data."""
     
-    def __init__(self, template_path, debug=False):
+    # Rulebook configuration (same as before)
+    rulebook_config = RULEBOOK_CONFIG
+    
+    def __init__(self, template_path, debug=False, writer_backend='openpyxl', constant_memory=False):
         self.template_path = template_path
         self.debug = debug
-        self.processor = DocumentProcessor(debug=debug)
-        
-        # Rulebook configuration (same as before)
-        self.rulebook_config = {
-            'vacancy_minimum': 0.05,  # 5% minimum
-            'property_tax_adjustments': {
-                'refinance': 1.075,  # +7.5% for refinance
-                'acquisition': 1.0
-            },
-            'insurance_adjustment': 1.05,  # +5%
-            'utilities_adjustment': 1.02,  # +2%
-            'rm_minimums_by_age': {
-                (0, 10): 500, (10, 20): 600, (20, 30): 700,
-                (30, 40): 800, (40, 50): 900, (50, 100): 1000
-            },
-            'rm_cap': 1500,  # Cap at $1,500/unit
-            'management_fee_tiers': [
-                (0, 500000, 0.05), (500000, 750000, 0.045),
-                (750000, 1000000, 0.04), (1000000, 1500000, 0.035),
-                (1500000, 2000000, 0.03), (2000000, float('inf'), 0.025)
-            ],
-            'professional_fees': {'minimum': 1000, 'maximum_per_unit': 400},
-            'replacement_reserves': 250,  # $250/unit
-            'minimum_expense_ratio': 0.28  # 28% minimum
-        }
+        # 'openpyxl' fills the template in place; 'xlsxwriter' writes the two sheets
+        # from scratch (faster, but without the template's own formatting)
+        self.writer_backend = writer_backend
+        # xlsxwriter only: stream each finished row to disk so memory stays flat for any
+        # rent roll size (standard mode is quicker for small, string-heavy sheets)
+        self.constant_memory = constant_memory
+        # Extracted tables are cached by source file content (see extraction_cache),
+        # so re-runs skip PDF parsing
+        self.processor = _get_processor(bool(debug))
     
     def generate_from_template(self, rent_roll_path, t12_path, property_info):
         """Generate underwriting package using existing template."""
@@ -54,8 +153,17 @@ class TemplateBasedGenerator:
         
         # Step 1: Extract and process data (same as rulebook compliant)
         print("📊 Extracting data using rulebook compliance...")
-        rent_roll_data = self._extract_rent_roll(rent_roll_path)
-        t12_data = self._extract_t12(t12_path)
+        if self.processor.pdf_backend == 'pymupdf':
+            # PyMuPDF is not thread-safe - parse the two documents one after the other
+            rent_roll_data = self._extract_rent_roll(rent_roll_path)
+            t12_data = self._extract_t12(t12_path)
+        else:
+            # The two PDFs are independent - parse them concurrently (camelot's ghostscript
+            # and tabula's Java subprocess run outside the GIL)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                rent_roll_future = executor.submit(self._extract_rent_roll, rent_roll_path)
+                t12_future = executor.submit(self._extract_t12, t12_path)
+                rent_roll_data, t12_data = rent_roll_future.result(), t12_future.result()
         
         # Step 2: Apply rulebook rules
         print("💰 Applying rulebook rules...")
@@ -82,51 +190,68 @@ class TemplateBasedGenerator:
             'noi_analysis': noi_analysis
         }
     
+    def _load_first_table(self, document_path):
+        """
+        Return the first table extracted from a document, cached by file content hash.
+        
+        The cache key also carries the PDF backend and the cache version, so switching
+        backend or changing the extraction code never serves a stale table.
+        """
+        return cached_extract(
+            document_path, self._extract_first_table, self.processor.pdf_backend,
+            should_cache=lambda table: table is not None  # Only successful extractions are cached
+        )
+    
+    def _extract_first_table(self, document_path):
+        """Run the document processor and return its first table, or None."""
+        results = self.processor.process_document(document_path)
+        return results['tables'][0] if results.get('tables') else None
+    
     def _extract_rent_roll(self, rent_roll_path):
         """Extract rent roll data."""
-        results = self.processor.process_document(rent_roll_path)
-        rent_roll_df = results['tables'][0] if results.get('tables') else None
+        rent_roll_df = self._load_first_table(rent_roll_path)
         
         if rent_roll_df is None:
             raise ValueError("Failed to extract rent roll data")
         
-        # Clean data
-        cleaned_data = []
-        for idx, row in rent_roll_df.iterrows():
-            if idx == 0:  # Skip header
-                continue
-                
-            unit_number = str(row.iloc[0]).strip()
-            if not unit_number or unit_number == 'nan' or 'Unit' in unit_number:
-                continue
-            
-            unit_type = str(row.iloc[2]).strip()
-            square_feet = self._safe_float(row.iloc[3], 1187)
-            current_rent = self._safe_float(row.iloc[5], 0)
-            tenant_name = str(row.iloc[4]).strip()
-            is_occupied = tenant_name and tenant_name != 'nan'
-            lease_end_date = str(row.iloc[10]).strip() if len(row) > 10 else ''
-            
-            cleaned_data.append({
-                'Unit_Number': unit_number,
-                'Unit_ID': str(row.iloc[1]).strip(),
-                'Unit_Type': unit_type,
-                'Square_Feet': square_feet,
-                'Current_Rent': current_rent,
-                'Is_Occupied': is_occupied,
-                'Tenant_Name': tenant_name if is_occupied else '',
-                'Lease_End_Date': lease_end_date,
-                'Water_Fees': self._safe_float(row.iloc[6], 65),
-                'Pest_Trash_Fees': self._safe_float(row.iloc[7], 15),
-                'Lease_Term': str(row.iloc[8]).strip() if len(row) > 8 else '12-Month'
-            })
-        
-        return pd.DataFrame(cleaned_data)
+        # Clean data column-wise instead of row by row
+        body = rent_roll_df[rent_roll_df.index != 0]  # Skip header
+        num_columns = body.shape[1]
+        
+        unit_number_col = body.iloc[:, 0].astype(str).str.strip()
+        keep = ((unit_number_col != '') & (unit_number_col != 'nan') &
+                ~unit_number_col.str.contains('Unit', regex=False)).to_numpy()
+        body = body[keep]
+        
+        tenant_names = body.iloc[:, 4].astype(str).str.strip().to_numpy()
+        is_occupied = (tenant_names != '') & (tenant_names != 'nan')
+        
+        if num_columns > 10:
+            lease_end_dates = body.iloc[:, 10].astype(str).str.strip().to_numpy()
+        else:
+            lease_end_dates = ''
+        if num_columns > 8:
+            lease_terms = body.iloc[:, 8].astype(str).str.strip().to_numpy()
+        else:
+            lease_terms = '12-Month'
+        
+        return pd.DataFrame({
+            'Unit_Number': unit_number_col.to_numpy()[keep],
+            'Unit_ID': body.iloc[:, 1].astype(str).str.strip().to_numpy(),
+            'Unit_Type': body.iloc[:, 2].astype(str).str.strip().to_numpy(),
+            'Square_Feet': self._safe_float_series(body.iloc[:, 3], 1187).to_numpy(),
+            'Current_Rent': self._safe_float_series(body.iloc[:, 5], 0).to_numpy(),
+            'Is_Occupied': is_occupied,
+            'Tenant_Name': np.where(is_occupied, tenant_names, ''),
+            'Lease_End_Date': lease_end_dates,
+            'Water_Fees': self._safe_float_series(body.iloc[:, 6], 65).to_numpy(),
+            'Pest_Trash_Fees': self._safe_float_series(body.iloc[:, 7], 15).to_numpy(),
+            'Lease_Term': lease_terms
+        })
     
     def _extract_t12(self, t12_path):
         """Extract T12 data."""
-        results = self.processor.process_document(t12_path)
-        t12_df = results['tables'][0] if results.get('tables') else None
+        t12_df = self._load_first_table(t12_path)
         
         if t12_df is None:
             raise ValueError("Failed to extract T12 data")
@@ -135,52 +260,24 @@ class TemplateBasedGenerator:
         financial_data = {}
         monthly_data = {}
         
-        for idx, row in t12_df.iterrows():
-            row_text = str(row.iloc[0]).strip().upper()
-            
-            # Get annual total (last column)
-            annual_amount = self._safe_float(row.iloc[-1], 0)
-            
-            # Get monthly data (columns 1-12)
-            monthly_amounts = []
-            for col in range(1, min(13, len(row))):
-                monthly_amounts.append(self._safe_float(row.iloc[col], 0))
-            
-            # Map line items
-            if 'GROSS POTENTIAL RENT' in row_text:
-                financial_data['gross_potential_rents'] = annual_amount
-                monthly_data['gross_potential_rents'] = monthly_amounts
-            elif 'LOSS TO LEASE' in row_text:
-                financial_data['loss_to_lease'] = annual_amount
-                monthly_data['loss_to_lease'] = monthly_amounts
-            elif 'VACANCY LOSS' in row_text:
-                financial_data['vacancy_loss'] = annual_amount
-                monthly_data['vacancy_loss'] = monthly_amounts
-            elif 'TOTAL PROPERTY RENTAL INCOME' in row_text:
-                financial_data['rental_income'] = annual_amount
-                monthly_data['rental_income'] = monthly_amounts
-            elif 'TOTAL OTHER INCOME' in row_text:
-                financial_data['other_income'] = annual_amount
-                monthly_data['other_income'] = monthly_amounts
-            elif 'PROPERTY TAXES' in row_text:
-                financial_data['property_taxes'] = annual_amount
-                monthly_data['property_taxes'] = monthly_amounts
-            elif 'INSURANCE' in row_text and 'TOTAL' in row_text:
-                financial_data['insurance'] = annual_amount
-                monthly_data['insurance'] = monthly_amounts
-            elif 'TOTAL UTILITIES' in row_text:
-                financial_data['utilities'] = annual_amount
-                monthly_data['utilities'] = monthly_amounts
-            elif 'MAINTENANCE' in row_text and 'REPAIR' in row_text:
-                financial_data['maintenance_repairs'] = annual_amount
-                monthly_data['maintenance_repairs'] = monthly_amounts
-            elif 'MANAGEMENT FEE' in row_text:
-                financial_data['management_fees'] = annual_amount
-                monthly_data['management_fees'] = monthly_amounts
-            elif 'NET OPERATING INCOME' in row_text:
-                financial_data['net_operating_income'] = annual_amount
-                monthly_data['net_operating_income'] = monthly_amounts
-                break  # Stop at NOI per rulebook
+        # Classify every label in one regex pass: the named group that matched is the line item
+        labels = t12_df.iloc[:, 0].astype(str).str.strip().str.upper()
+        matched = labels.str.extract(T12_LINE_PATTERN).notna()
+        line_items = matched.idxmax(axis=1).where(matched.any(axis=1)).to_numpy()
+        
+        # Stop at NOI per rulebook
+        noi_rows = np.flatnonzero(line_items == 'net_operating_income')
+        if len(noi_rows):
+            line_items = line_items[:noi_rows[0] + 1]
+        
+        # Get annual totals (last column) and monthly data (columns 1-12), converted up front
+        annual_amounts = self._safe_float_series(t12_df.iloc[:, -1], 0).tolist()
+        monthly_block = t12_df.iloc[:, 1:13].apply(self._safe_float_series).to_numpy()
+        
+        for position in np.flatnonzero(pd.notna(line_items)):
+            line_item = line_items[position]
+            financial_data[line_item] = annual_amounts[position]
+            monthly_data[line_item] = monthly_block[position].tolist()
         
         financial_data['monthly_data'] = monthly_data
         return financial_data
@@ -194,13 +291,12 @@ class TemplateBasedGenerator:
         occupied_rental_income = occupied_units['Current_Rent'].sum() * 12
         
         # Vacant unit income using average rent of unit type
-        vacant_rental_income = 0
-        for unit_type in vacant_units['Unit_Type'].unique():
-            type_occupied = occupied_units[occupied_units['Unit_Type'] == unit_type]
-            if len(type_occupied) > 0:
-                avg_rent = type_occupied['Current_Rent'].mean()
-                vacant_count = len(vacant_units[vacant_units['Unit_Type'] == unit_type])
-                vacant_rental_income += avg_rent * vacant_count * 12
+        # (types with no occupied units to average contribute nothing)
+        avg_rent_by_type = occupied_units.groupby('Unit_Type')['Current_Rent'].mean()
+        vacant_count_by_type = vacant_units['Unit_Type'].value_counts()
+        vacant_rental_income = (
+            avg_rent_by_type.reindex(vacant_count_by_type.index).fillna(0) * vacant_count_by_type
+        ).sum() * 12
         
         total_rental_income = occupied_rental_income + vacant_rental_income
         other_income = t12_data.get('other_income', 0)
@@ -228,26 +324,23 @@ class TemplateBasedGenerator:
         
         effective_gross_income = gross_potential_income - vacancy_loss
         
-        # Apply rulebook adjustments
-        actual_property_taxes = t12_data.get('property_taxes', 0)
+        # Apply rulebook adjustments to taxes, insurance, utilities and R&M in one vector:
+        # min(max(actual * adjustment, floor), cap) - R&M carries the age-based floor and per-unit cap
         if transaction_type == 'refinance':
-            property_taxes = actual_property_taxes * self.rulebook_config['property_tax_adjustments']['refinance']
+            tax_adjustment = self.rulebook_config['property_tax_adjustments']['refinance']
         else:
-            property_taxes = actual_property_taxes
-        
-        actual_insurance = t12_data.get('insurance', 0)
-        insurance = actual_insurance * self.rulebook_config['insurance_adjustment']
-        
-        actual_utilities = t12_data.get('utilities', 0)
-        utilities = actual_utilities * self.rulebook_config['utilities_adjustment']
-        
-        # R&M with age-based minimums
-        actual_rm = t12_data.get('maintenance_repairs', 0)
-        rm_minimum = self._calculate_rm_minimum(total_units, property_age)
-        maintenance_repairs = max(actual_rm, rm_minimum)
-        rm_cap = total_units * self.rulebook_config['rm_cap']
-        if maintenance_repairs > rm_cap:
-            maintenance_repairs = rm_cap
+            tax_adjustment = 1.0
+        actuals = np.array([t12_data.get(key, 0) for key in
+                            ('property_taxes', 'insurance', 'utilities', 'maintenance_repairs')], dtype=float)
+        adjustments = np.array([tax_adjustment,
+                                self.rulebook_config['insurance_adjustment'],
+                                self.rulebook_config['utilities_adjustment'],
+                                1.0])
+        floors = np.array([-np.inf, -np.inf, -np.inf, self._calculate_rm_minimum(total_units, property_age)])
+        caps = np.array([np.inf, np.inf, np.inf, total_units * self.rulebook_config['rm_cap']])
+        property_taxes, insurance, utilities, maintenance_repairs = (
+            np.minimum(np.maximum(actuals * adjustments, floors), caps).tolist()
+        )
         
         # Management fees with tiers
         management_fees = self._calculate_management_fees(gross_potential_income)
@@ -288,7 +381,11 @@ class TemplateBasedGenerator:
         }
     
     def _calculate_noi_and_validate(self, income_analysis, expense_analysis):
-        """Calculate NOI."""
+        """Calculate NOI.
+        
+        Pure element-wise arithmetic: the analysis values may be scalars (one property)
+        or equal-length numpy arrays (a portfolio), and the result follows suit.
+        """
         net_operating_income = expense_analysis['effective_gross_income'] - expense_analysis['total_expenses']
         
         return {
@@ -302,24 +399,110 @@ class TemplateBasedGenerator:
     def _fill_template_with_data(self, rent_roll_data, t12_data, income_analysis, expense_analysis, noi_analysis, property_info):
         """Fill the existing template with extracted and processed data."""
         
-        # Load the template
+        # One clock read for both the file name and the report date in the sheet
+        now = datetime.now()
+        report_date = now.strftime('%B %d, %Y')
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        output_path = f"outputs/Filled_Template_Package_{timestamp}.xlsx"
+        os.makedirs("outputs", exist_ok=True)
+        
+        if self.writer_backend == 'xlsxwriter':
+            self._write_package_xlsxwriter(output_path, rent_roll_data, t12_data, income_analysis,
+                                           expense_analysis, noi_analysis, property_info, report_date)
+            return output_path
+        
+        # Load the template. data_only and keep_links stay at their defaults so the saved
+        # package keeps the template's formulas and external-link tables intact.
         wb = load_workbook(self.template_path)
         
         # Fill Rent Roll sheet
-        self._fill_rent_roll_sheet(wb, rent_roll_data, property_info)
+        self._fill_rent_roll_sheet(wb, rent_roll_data, property_info, report_date)
         
         # Fill T-12 sheet
         self._fill_t12_sheet(wb, t12_data, income_analysis, expense_analysis, noi_analysis)
         
         # Save the filled template
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_path = f"outputs/Filled_Template_Package_{timestamp}.xlsx"
-        os.makedirs("outputs", exist_ok=True)
         wb.save(output_path)
         
         return output_path
     
-    def _fill_rent_roll_sheet(self, wb, rent_roll_data, property_info):
+    def _unit_mix_rows(self, rent_roll_data):
+        """Unit mix summary values for template columns C-I, one tuple per unit type."""
+        rows = []
+        for unit_type, count in rent_roll_data['Unit_Type'].value_counts().items():
+            type_data = rent_roll_data[rent_roll_data['Unit_Type'] == unit_type]
+            avg_sqft = type_data['Square_Feet'].mean()
+            avg_rent = type_data[type_data['Is_Occupied']]['Current_Rent'].mean()
+            
+            rows.append((
+                count,  # Units
+                unit_type,  # Type
+                f"${avg_sqft:,.0f}",  # Unit Square Feet
+                f"${count * avg_sqft:,.0f}",  # Total SF
+                f"${avg_rent * 1.08:,.0f}",  # Market Rent (8% above current)
+                f"${count * avg_rent * 1.08:,.0f}",  # Monthly Market
+                f"${count * avg_rent * 1.08 * 12:,.0f}"  # Annual Market
+            ))
+        return rows
+    
+    def _rent_roll_detail_rows(self, rent_roll_data):
+        """Yield (row offset, values for template columns A-I, is_occupied) per unit."""
+        # Money labels are formatted a whole column at a time, outside the row loop
+        sqft_labels = rent_roll_data['Square_Feet'].map('${:,.0f}'.format)
+        rent_labels = rent_roll_data['Current_Rent'].map('${:,.0f}'.format).where(
+            rent_roll_data['Current_Rent'] > 0, 'VACANT'
+        )
+        
+        # Walk the columns side by side as arrays - no per-row tuple or Series objects
+        columns = zip(
+            rent_roll_data.index,
+            rent_roll_data['Unit_Number'].to_numpy(),
+            rent_roll_data['Unit_ID'].to_numpy(),
+            rent_roll_data['Unit_Type'].to_numpy(),
+            sqft_labels.to_numpy(),
+            rent_roll_data['Tenant_Name'].to_numpy(),
+            rent_labels.to_numpy(),
+            rent_roll_data['Water_Fees'].to_numpy(),
+            rent_roll_data['Pest_Trash_Fees'].to_numpy(),
+            rent_roll_data['Lease_Term'].to_numpy(),
+            rent_roll_data['Is_Occupied'].to_numpy()
+        )
+        for (idx, unit_number, unit_id, unit_type, sqft_label, tenant_name, rent_label,
+             water_fees, pest_trash_fees, lease_term, is_occupied) in columns:
+            yield idx, (
+                unit_number,
+                unit_id,
+                unit_type,
+                sqft_label,
+                tenant_name if is_occupied else 'VACANT',
+                rent_label,
+                water_fees if is_occupied else '',
+                pest_trash_fees if is_occupied else '',
+                lease_term if is_occupied else ''
+            ), is_occupied
+    
+    def _t12_line_values(self, income_analysis, expense_analysis, noi_analysis):
+        """Rulebook-adjusted annual total and note for each T-12 line item we overwrite."""
+        return {
+            'gross_potential_rents': (f"${income_analysis['gross_potential_income']:,.0f}", None),
+            'vacancy_loss': (f"${-expense_analysis['vacancy_loss']:,.0f}", None),
+            'rental_income': (f"${income_analysis['total_rental_income']:,.0f}", None),
+            'other_income': (f"${income_analysis['other_income']:,.0f}", None),
+            'property_taxes': (f"${expense_analysis['property_taxes']:,.0f}", "Adjusted +7.5% for refinance per rulebook"),
+            'insurance': (f"${expense_analysis['insurance']:,.0f}", "Adjusted +5% per rulebook"),
+            'utilities': (f"${expense_analysis['utilities']:,.0f}", "Adjusted +2% per rulebook"),
+            'maintenance_repairs': (f"${expense_analysis['maintenance_repairs']:,.0f}", "Age-based minimum applied per rulebook"),
+            'management_fees': (f"${expense_analysis['management_fees']:,.0f}", "Tier-based calculation per rulebook"),
+            'net_operating_income': (f"${noi_analysis['net_operating_income']:,.0f}", "Calculated with rulebook adjustments")
+        }
+    
+    def _expense_ratio_row(self, expense_analysis):
+        """Label, value and note for the Expense Ratio row added below NOI."""
+        return ("Expense Ratio",
+                f"{expense_analysis['expense_ratio']:.1%}",
+                f"Meets {self.rulebook_config['minimum_expense_ratio']:.0%} minimum per rulebook")
+    
+    def _fill_rent_roll_sheet(self, wb, rent_roll_data, property_info, report_date):
         """Fill the Rent Roll sheet with cleaned data."""
         
         if 'Rent Roll' not in wb.sheetnames:
@@ -329,53 +512,31 @@ class TemplateBasedGenerator:
         ws = wb['Rent Roll']
         
         # Update property information at the top
-        ws['A1'] = getattr(property_info, 'property_name', 'Bolden Heights Apartments')
-        ws['A2'] = getattr(property_info, 'property_address', '3350 Mount Gilead Road Atlanta')
-        ws['A3'] = datetime.now().strftime('%B %d, %Y')
+        ws.cell(row=1, column=COL_IDX['A'], value=getattr(property_info, 'property_name', 'Bolden Heights Apartments'))
+        ws.cell(row=2, column=COL_IDX['A'], value=getattr(property_info, 'property_address', '3350 Mount Gilead Road Atlanta'))
+        ws.cell(row=3, column=COL_IDX['A'], value=report_date)
         
         # Update unit mix summary (rows 8-11)
-        unit_types = rent_roll_data['Unit_Type'].value_counts()
-        
-        row = 8
-        for unit_type, count in unit_types.items():
-            type_data = rent_roll_data[rent_roll_data['Unit_Type'] == unit_type]
-            avg_sqft = type_data['Square_Feet'].mean()
-            avg_rent = type_data[type_data['Is_Occupied']]['Current_Rent'].mean()
-            
-            ws[f'C{row}'] = count  # Units
-            ws[f'D{row}'] = unit_type  # Type
-            ws[f'E{row}'] = f"${avg_sqft:,.0f}"  # Unit Square Feet
-            ws[f'F{row}'] = f"${count * avg_sqft:,.0f}"  # Total SF
-            ws[f'G{row}'] = f"${avg_rent * 1.08:,.0f}"  # Market Rent (8% above current)
-            ws[f'H{row}'] = f"${count * avg_rent * 1.08:,.0f}"  # Monthly Market
-            ws[f'I{row}'] = f"${count * avg_rent * 1.08 * 12:,.0f}"  # Annual Market
-            
-            row += 1
+        for row, values in enumerate(self._unit_mix_rows(rent_roll_data), start=8):
+            for column, value in enumerate(values, start=COL_IDX['C']):
+                ws.cell(row=row, column=column, value=value)
         
         # Fill detailed rent roll starting at row 14
         start_row = 14
-        for idx, unit in rent_roll_data.iterrows():
+        for idx, values, is_occupied in self._rent_roll_detail_rows(rent_roll_data):
             row = start_row + idx
             
             # Ensure we don't exceed Excel limits
             if row > 1000:
                 break
             
-            ws[f'A{row}'] = unit['Unit_Number']
-            ws[f'B{row}'] = unit['Unit_ID']
-            ws[f'C{row}'] = unit['Unit_Type']
-            ws[f'D{row}'] = f"${unit['Square_Feet']:,.0f}"
-            ws[f'E{row}'] = unit['Tenant_Name'] if unit['Is_Occupied'] else 'VACANT'
-            ws[f'F{row}'] = f"${unit['Current_Rent']:,.0f}" if unit['Current_Rent'] > 0 else 'VACANT'
-            ws[f'G{row}'] = unit['Water_Fees'] if unit['Is_Occupied'] else ''
-            ws[f'H{row}'] = unit['Pest_Trash_Fees'] if unit['Is_Occupied'] else ''
-            ws[f'I{row}'] = unit['Lease_Term'] if unit['Is_Occupied'] else ''
+            for column, value in enumerate(values, start=COL_IDX['A']):
+                ws.cell(row=row, column=column, value=value)
             
             # Format vacant units differently
-            if not unit['Is_Occupied']:
-                for col in ['E', 'F', 'G', 'H', 'I']:
-                    cell = ws[f'{col}{row}']
-                    cell.fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+            if not is_occupied:
+                for col in range(COL_IDX['E'], COL_IDX['I'] + 1):
+                    ws.cell(row=row, column=col).fill = VACANT_FILL
         
         print("   ✅ Rent Roll sheet updated")
     
@@ -389,79 +550,109 @@ class TemplateBasedGenerator:
         ws = wb['T-12']
         
         # Update header
-        ws['A1'] = "Bolden Heights Apartments - Trailing 12 Month Operating Financials (UNDERWRITER ADJUSTED)"
-        ws['A2'] = "3350 Mount Gilead Road Atlanta, GA 30311"
+        ws.cell(row=1, column=COL_IDX['A'], value=T12_TITLE)
+        ws.cell(row=2, column=COL_IDX['A'], value=T12_ADDRESS)
         
         # Fill key financial rows with rulebook-adjusted values
-        # We'll update the annual totals (last column) with our calculated values
-        
-        # Find and update key rows
-        for row in range(1, 60):  # Search through first 60 rows
-            cell_value = ws[f'A{row}'].value
-            if cell_value:
-                cell_text = str(cell_value).upper()
-                
-                # Update annual totals with our rulebook-compliant calculations
-                if 'GROSS POTENTIAL RENT' in cell_text:
-                    ws[f'O{row}'] = f"${income_analysis['gross_potential_income']:,.0f}"
-                elif 'VACANCY LOSS' in cell_text:
-                    ws[f'O{row}'] = f"${-expense_analysis['vacancy_loss']:,.0f}"
-                elif 'TOTAL PROPERTY RENTAL INCOME' in cell_text:
-                    ws[f'O{row}'] = f"${income_analysis['total_rental_income']:,.0f}"
-                elif 'TOTAL OTHER INCOME' in cell_text:
-                    ws[f'O{row}'] = f"${income_analysis['other_income']:,.0f}"
-                elif 'PROPERTY TAXES' in cell_text:
-                    ws[f'O{row}'] = f"${expense_analysis['property_taxes']:,.0f}"
-                    # Add note about adjustment
-                    ws[f'P{row}'] = "Adjusted +7.5% for refinance per rulebook"
-                elif 'INSURANCE' in cell_text and 'TOTAL' in cell_text:
-                    ws[f'O{row}'] = f"${expense_analysis['insurance']:,.0f}"
-                    ws[f'P{row}'] = "Adjusted +5% per rulebook"
-                elif 'TOTAL UTILITIES' in cell_text:
-                    ws[f'O{row}'] = f"${expense_analysis['utilities']:,.0f}"
-                    ws[f'P{row}'] = "Adjusted +2% per rulebook"
-                elif 'MAINTENANCE' in cell_text and 'REPAIR' in cell_text:
-                    ws[f'O{row}'] = f"${expense_analysis['maintenance_repairs']:,.0f}"
-                    ws[f'P{row}'] = "Age-based minimum applied per rulebook"
-                elif 'MANAGEMENT FEE' in cell_text:
-                    ws[f'O{row}'] = f"${expense_analysis['management_fees']:,.0f}"
-                    ws[f'P{row}'] = "Tier-based calculation per rulebook"
-                elif 'NET OPERATING INCOME' in cell_text:
-                    ws[f'O{row}'] = f"${noi_analysis['net_operating_income']:,.0f}"
-                    ws[f'P{row}'] = "Calculated with rulebook adjustments"
-                    
-                    # Add expense ratio
-                    ws[f'A{row+1}'] = "Expense Ratio"
-                    ws[f'O{row+1}'] = f"{expense_analysis['expense_ratio']:.1%}"
-                    ws[f'P{row+1}'] = f"Meets {self.rulebook_config['minimum_expense_ratio']:.0%} minimum per rulebook"
-                    break  # Stop at NOI per rulebook
+        # We'll update the annual totals (column O) with our calculated values, plus a note in column P
+        t12_updates = self._t12_line_values(income_analysis, expense_analysis, noi_analysis)
+        
+        # Single pass over the column A labels (first 59 rows); each label is matched once
+        labels = ws.iter_rows(min_row=1, max_row=59, max_col=1, values_only=True)
+        for row, (cell_value,) in enumerate(labels, start=1):
+            if not cell_value:
+                continue
+            match = T12_FILL_PATTERN.match(str(cell_value).upper())
+            if match is None:
+                continue
+            
+            value, note = t12_updates[match.lastgroup]
+            ws.cell(row=row, column=COL_IDX['O'], value=value)
+            if note:
+                ws.cell(row=row, column=COL_IDX['P'], value=note)
+            
+            if match.lastgroup == 'net_operating_income':
+                # Add expense ratio
+                label, value, note = self._expense_ratio_row(expense_analysis)
+                ws.cell(row=row+1, column=COL_IDX['A'], value=label)
+                ws.cell(row=row+1, column=COL_IDX['O'], value=value)
+                ws.cell(row=row+1, column=COL_IDX['P'], value=note)
+                break  # Stop at NOI per rulebook
         
         print("   ✅ T-12 sheet updated with rulebook adjustments")
     
+    def _write_package_xlsxwriter(self, output_path, rent_roll_data, t12_data, income_analysis, expense_analysis, noi_analysis, property_info, report_date):
+        """Write the Rent Roll and T-12 sheets from scratch with xlsxwriter, in the template's cell layout."""
+        
+        # constant_memory flushes each row once a later row is written, so rows must be
+        # written strictly top to bottom; the detail block is pushed down below the unit mix
+        wb = xlsxwriter.Workbook(output_path, {'constant_memory': self.constant_memory, 'nan_inf_to_errors': True})
+        # Formats are created once, not per cell
+        header_format = wb.add_format({'bold': True})
+        vacant_format = wb.add_format({'bg_color': '#FFCCCC'})
+        
+        # Rent Roll - same rows/columns as the template (xlsxwriter is 0-based)
+        ws = wb.add_worksheet('Rent Roll')
+        ws.write(0, 0, getattr(property_info, 'property_name', 'Bolden Heights Apartments'))
+        ws.write(1, 0, getattr(property_info, 'property_address', '3350 Mount Gilead Road Atlanta'))
+        ws.write(2, 0, report_date)
+        
+        ws.write_row(6, COL_IDX['C'] - 1, ('Units', 'Type', 'Unit SF', 'Total SF',
+                                             'Market Rent', 'Monthly Market', 'Annual Market'), header_format)
+        unit_mix_rows = self._unit_mix_rows(rent_roll_data)
+        for row, values in enumerate(unit_mix_rows, start=7):
+            ws.write_row(row, COL_IDX['C'] - 1, values)
+        
+        # The template leaves five unit-mix rows above the detail header (row 12); more unit
+        # types push the header and details down instead of overwriting them
+        header_row = 7 + max(len(unit_mix_rows), 5)
+        ws.write_row(header_row, 0, ('Unit', 'Unit ID', 'Type', 'SF', 'Tenant', 'Rent',
+                                     'Water', 'Pest/Trash', 'Lease Term'), header_format)
+        for idx, values, is_occupied in self._rent_roll_detail_rows(rent_roll_data):
+            row = header_row + 1 + idx
+            if row > 999:  # Same 1,000-row limit as the template fill
+                break
+            if is_occupied:
+                ws.write_row(row, 0, values)
+            else:
+                ws.write_row(row, 0, values[:4])
+                ws.write_row(row, COL_IDX['E'] - 1, values[4:], vacant_format)
+        
+        # T-12 - one line item per row: label and the 12 actual months (columns A-M) in a
+        # single write_row, then the adjusted annual total (column O) and note (column P)
+        ws = wb.add_worksheet('T-12')
+        ws.write(0, 0, T12_TITLE)
+        ws.write(1, 0, T12_ADDRESS)
+        
+        monthly_data = t12_data.get('monthly_data', {})
+        t12_values = self._t12_line_values(income_analysis, expense_analysis, noi_analysis)
+        for row, (line_item, (value, note)) in enumerate(t12_values.items(), start=3):
+            ws.write_row(row, 0, (T12_LINE_LABELS[line_item], *monthly_data.get(line_item, ())))
+            ws.write(row, COL_IDX['O'] - 1, value)
+            if note:
+                ws.write(row, COL_IDX['P'] - 1, note)
+        label, value, note = self._expense_ratio_row(expense_analysis)
+        ws.write(row + 1, 0, label)
+        ws.write(row + 1, COL_IDX['O'] - 1, value)
+        ws.write(row + 1, COL_IDX['P'] - 1, note)
+        
+        wb.close()
+        print("   ✅ Rent Roll and T-12 sheets written (xlsxwriter)")
+    
     def _calculate_rm_minimum(self, total_units, property_age):
         """Calculate R&M minimum based on property age."""
-        for (min_age, max_age), rate in self.rulebook_config['rm_minimums_by_age'].items():
-            if min_age <= property_age < max_age:
-                return total_units * rate
-        return total_units * 1000
+        band = np.searchsorted(_RM_AGE_EDGES, property_age, side='right') - 1
+        return total_units * _RM_RATES[band].item()
     
     def _calculate_management_fees(self, gross_potential_income):
         """Calculate management fees based on income tiers."""
-        for min_income, max_income, rate in self.rulebook_config['management_fee_tiers']:
-            if min_income <= gross_potential_income < max_income:
-                return gross_potential_income * rate
-        return gross_potential_income * 0.025
+        tier = np.searchsorted(_MGMT_EDGES, gross_potential_income, side='right') - 1
+        return gross_potential_income * _MGMT_RATES[tier].item()
     
-    def _safe_float(self, value, default=0):
-        """Safely convert value to float."""
-        if pd.isna(value):
-            return default
-        try:
-            if isinstance(value, str):
-                value = value.replace('$', '').replace(',', '').strip()
-            return float(value) if value and str(value) != 'nan' else default
-        except:
-            return default
+    def _safe_float_series(self, values, default=0):
+        """Strip '$' and ',' and coerce a column to float in one vectorized pass, missing -> default."""
+        cleaned = values.astype(str).str.replace(_MONEY_RE, '', regex=True).str.strip()
+        return pd.to_numeric(cleaned, errors='coerce').fillna(default).astype(float)
 
 def main():
     """Main function to run the template-based generator."""
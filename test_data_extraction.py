@@ -3,17 +3,25 @@
 Test data extraction script for analyzing rent roll and T12 documents.
 """
 
+import functools
 import os
 import sys
 import pandas as pd
 from pathlib import Path
 from document_processor import DocumentProcessor
 from underwriting_analyzer import UnderwritingAnalyzer
+from extraction_cache import cached_extract
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logging.getLogger("pdfminer").setLevel(logging.WARNING)
+
+@functools.lru_cache(maxsize=2)
+def _get_processor(debug):
+    """Shared DocumentProcessor per debug setting (it keeps no per-document state)."""
+    return DocumentProcessor(debug=debug)
 
 def extract_and_analyze_test_data():
     """Extract and analyze data from the test files."""
@@ -24,17 +32,27 @@ def extract_and_analyze_test_data():
     t12_path = f"{test_dir}/t12/T12_3350_Mount_Gilead_Rd_Atlanta_GA_30311.pdf"
     
     # Initialize processor
-    processor = DocumentProcessor(debug=True)
+    processor = _get_processor(True)
+    # A fresh analyzer per run - it accumulates the loaded rent roll/T12 as state
     analyzer = UnderwritingAnalyzer(debug=True)
     
+    rent_roll_results = t12_results = rent_roll_analysis = t12_analysis = summary = None
+    
     print("🔍 Starting data extraction from test files...")
     print("=" * 60)
     
+    def extract(path):
+        # One document at a time, so pdf_backend='pymupdf' (not thread-safe) also works here
+        return cached_extract(
+            path, processor.process_document, processor.pdf_backend,
+            should_cache=lambda results: bool(results.get('tables'))
+        )
+    
     # Extract rent roll data
     print("\n📊 Processing Rent Roll...")
     if os.path.exists(rent_roll_path):
         try:
-            rent_roll_results = processor.process_document(rent_roll_path)
+            rent_roll_results = extract(rent_roll_path)
             print(f"✅ Rent roll processed successfully")
             print(f"   - Document type: {rent_roll_results.get('document_type', 'unknown')}")
             print(f"   - Tables found: {len(rent_roll_results.get('tables', []))}")
@@ -45,9 +63,10 @@ def extract_and_analyze_test_data():
                 print(f"   - Table shape: {rent_roll_df.shape}")
                 print(f"   - Columns: {list(rent_roll_df.columns)}")
                 
-                # Show first few rows
-                print("\n   📋 Sample Rent Roll Data:")
-                print(rent_roll_df.head().to_string())
+                # Show first few rows (capped to the first 6 columns so wide tables stay cheap to format)
+                if processor.debug:
+                    print("\n   📋 Sample Rent Roll Data:")
+                    print(rent_roll_df.iloc[:5, :6].to_string())
                 
                 # Analyze rent roll
                 rent_roll_analysis = analyzer.load_rent_roll(rent_roll_df)
@@ -57,8 +76,8 @@ def extract_and_analyze_test_data():
                 print(f"   - Vacant units: {rent_roll_analysis.get('rent_analysis', {}).get('vacant_units', 'N/A')}")
                 print(f"   - Average rent: ${rent_roll_analysis.get('rent_analysis', {}).get('average_rent', 'N/A'):,.0f}")
                 
-        except Exception as e:
-            print(f"❌ Error processing rent roll: {str(e)}")
+        except Exception:
+            logger.exception("❌ Error processing rent roll")
     else:
         print(f"❌ Rent roll file not found: {rent_roll_path}")
     
@@ -66,7 +85,7 @@ def extract_and_analyze_test_data():
     print("\n📊 Processing T12...")
     if os.path.exists(t12_path):
         try:
-            t12_results = processor.process_document(t12_path)
+            t12_results = extract(t12_path)
             print(f"✅ T12 processed successfully")
             print(f"   - Document type: {t12_results.get('document_type', 'unknown')}")
             print(f"   - Tables found: {len(t12_results.get('tables', []))}")
@@ -77,9 +96,10 @@ def extract_and_analyze_test_data():
                 print(f"   - Table shape: {t12_df.shape}")
                 print(f"   - Columns: {list(t12_df.columns)}")
                 
-                # Show first few rows
-                print("\n   📋 Sample T12 Data:")
-                print(t12_df.head().to_string())
+                # Show first few rows (capped to the first 6 columns so wide tables stay cheap to format)
+                if processor.debug:
+                    print("\n   📋 Sample T12 Data:")
+                    print(t12_df.iloc[:5, :6].to_string())
                 
                 # Analyze T12
                 t12_analysis = analyzer.load_t12(t12_df)
@@ -88,8 +108,8 @@ def extract_and_analyze_test_data():
                 print(f"   - Total expenses: ${t12_analysis.get('expense_analysis', {}).get('total_expenses', 'N/A'):,.0f}")
                 print(f"   - Net Operating Income: ${t12_analysis.get('expense_analysis', {}).get('net_operating_income', 'N/A'):,.0f}")
                 
-        except Exception as e:
-            print(f"❌ Error processing T12: {str(e)}")
+        except Exception:
+            logger.exception("❌ Error processing T12")
     else:
         print(f"❌ T12 file not found: {t12_path}")
     
@@ -102,25 +122,28 @@ def extract_and_analyze_test_data():
         print(f"   - Cap rate: {summary.get('valuation', {}).get('cap_rate', 'N/A')}%")
         print(f"   - Property value: ${summary.get('valuation', {}).get('estimated_value', 'N/A'):,.0f}")
         
-    except Exception as e:
-        print(f"❌ Error generating summary: {str(e)}")
+    except Exception:
+        logger.exception("❌ Error generating summary")
     
     print("\n" + "=" * 60)
     print("🎯 Data Extraction Complete!")
     
     return {
-        'rent_roll': rent_roll_results if 'rent_roll_results' in locals() else None,
-        't12': t12_results if 't12_results' in locals() else None,
-        'rent_roll_analysis': rent_roll_analysis if 'rent_roll_analysis' in locals() else None,
-        't12_analysis': t12_analysis if 't12_analysis' in locals() else None,
-        'summary': summary if 'summary' in locals() else None
+        'rent_roll': rent_roll_results,
+        't12': t12_results,
+        'rent_roll_analysis': rent_roll_analysis,
+        't12_analysis': t12_analysis,
+        'summary': summary
     }
 
 def analyze_for_underwriting_docs(extracted_data):
     """Analyze extracted data for underwriting document generation."""
     
-    print("\n🔍 Analyzing data for underwriting document generation...")
-    print("=" * 60)
+    # Report lines are collected and written out in one go at the end
+    lines = []
+    
+    lines.append("\n🔍 Analyzing data for underwriting document generation...")
+    lines.append("=" * 60)
     
     rent_roll_data = extracted_data.get('rent_roll')
     t12_data = extracted_data.get('t12')
@@ -128,50 +151,54 @@ def analyze_for_underwriting_docs(extracted_data):
     t12_analysis = extracted_data.get('t12_analysis')
     summary = extracted_data.get('summary')
     
+    rent_roll_ready = bool(rent_roll_data and rent_roll_data.get('tables'))
+    t12_ready = bool(t12_data and t12_data.get('tables'))
+    summary_ready = bool(summary and summary.get('noi_analysis'))
+    
     # 1. Clean Rent Roll Analysis
-    print("\n📋 1. Clean Rent Roll Requirements:")
-    if rent_roll_data and rent_roll_data.get('tables'):
+    lines.append("\n📋 1. Clean Rent Roll Requirements:")
+    if rent_roll_ready:
         rent_roll_df = rent_roll_data['tables'][0]
-        print(f"   ✅ Rent roll data available")
-        print(f"   - Shape: {rent_roll_df.shape}")
-        print(f"   - Columns to keep: Unit, Type, Sq Ft, Current Rent, Lease Expiry, Status")
-        print(f"   - Columns to remove: Deposits, Tenant Names, Balances Owed")
+        lines.append(f"   ✅ Rent roll data available")
+        lines.append(f"   - Shape: {rent_roll_df.shape}")
+        lines.append(f"   - Columns to keep: Unit, Type, Sq Ft, Current Rent, Lease Expiry, Status")
+        lines.append(f"   - Columns to remove: Deposits, Tenant Names, Balances Owed")
         
         # Check for required columns
         required_columns = ['unit', 'type', 'rent', 'sqft', 'status']
-        available_columns = [col.lower() for col in rent_roll_df.columns]
-        missing_columns = [col for col in required_columns if not any(col in avail_col for avail_col in available_columns)]
+        available_columns = rent_roll_df.columns.astype(str).str.lower()
+        missing_columns = [col for col in required_columns if not available_columns.str.contains(col, regex=False).any()]
         
         if missing_columns:
-            print(f"   ⚠️ Missing columns: {missing_columns}")
+            lines.append(f"   ⚠️ Missing columns: {missing_columns}")
         else:
-            print(f"   ✅ All required columns found")
+            lines.append(f"   ✅ All required columns found")
     else:
-        print(f"   ❌ No rent roll data available")
+        lines.append(f"   ❌ No rent roll data available")
     
     # 2. Clean T12 Analysis
-    print("\n📋 2. Clean T12 Requirements:")
-    if t12_data and t12_data.get('tables'):
+    lines.append("\n📋 2. Clean T12 Requirements:")
+    if t12_ready:
         t12_df = t12_data['tables'][0]
-        print(f"   ✅ T12 data available")
-        print(f"   - Shape: {t12_df.shape}")
-        print(f"   - Must cut off at Net Operating Income (NOI)")
-        print(f"   - Remove: Depreciation, Interest expense, CapEx, Below-the-line items")
+        lines.append(f"   ✅ T12 data available")
+        lines.append(f"   - Shape: {t12_df.shape}")
+        lines.append(f"   - Must cut off at Net Operating Income (NOI)")
+        lines.append(f"   - Remove: Depreciation, Interest expense, CapEx, Below-the-line items")
         
         # Check for NOI
-        if 'noi' in str(t12_df.columns).lower() or 'net operating income' in str(t12_df.columns).lower():
-            print(f"   ✅ NOI found in data")
+        if t12_df.columns.astype(str).str.lower().str.contains('noi|net operating income').any():
+            lines.append(f"   ✅ NOI found in data")
         else:
-            print(f"   ⚠️ NOI not found - may need to calculate")
+            lines.append(f"   ⚠️ NOI not found - may need to calculate")
     else:
-        print(f"   ❌ No T12 data available")
+        lines.append(f"   ❌ No T12 data available")
     
     # 3. Underwriting Summary Requirements
-    print("\n📋 3. Underwriting Summary Requirements:")
+    lines.append("\n📋 3. Underwriting Summary Requirements:")
     if summary:
-        print(f"   ✅ Summary data available")
-        print(f"   - Required columns: Line Item, $ Amount, % of EGI, Notes")
-        print(f"   - Current NOI: ${summary.get('noi_analysis', {}).get('net_operating_income', 'N/A'):,.0f}")
+        lines.append(f"   ✅ Summary data available")
+        lines.append(f"   - Required columns: Line Item, $ Amount, % of EGI, Notes")
+        lines.append(f"   - Current NOI: ${summary.get('noi_analysis', {}).get('net_operating_income', 'N/A'):,.0f}")
         
         # Check for required line items
         required_line_items = [
@@ -181,60 +208,56 @@ def analyze_for_underwriting_docs(extracted_data):
             'Management Fee', 'Replacement Reserves', 'Net Operating Income'
         ]
         
-        print(f"   - Required line items: {len(required_line_items)}")
+        lines.append(f"   - Required line items: {len(required_line_items)}")
     else:
-        print(f"   ❌ No summary data available")
+        lines.append(f"   ❌ No summary data available")
     
     # 4. Data Quality Assessment
-    print("\n📋 4. Data Quality Assessment:")
-    quality_score = 0
+    lines.append("\n📋 4. Data Quality Assessment:")
     max_score = 100
     
-    if rent_roll_data and rent_roll_data.get('tables'):
-        quality_score += 40
-        print(f"   ✅ Rent roll data: +40 points")
-    else:
-        print(f"   ❌ No rent roll data: 0 points")
-    
-    if t12_data and t12_data.get('tables'):
-        quality_score += 40
-        print(f"   ✅ T12 data: +40 points")
-    else:
-        print(f"   ❌ No T12 data: 0 points")
-    
-    if summary and summary.get('noi_analysis'):
-        quality_score += 20
-        print(f"   ✅ Summary analysis: +20 points")
-    else:
-        print(f"   ❌ No summary analysis: 0 points")
+    # (label, missing label, ready, points) for each scored input
+    quality_checks = [
+        ("Rent roll data", "No rent roll data", rent_roll_ready, 40),
+        ("T12 data", "No T12 data", t12_ready, 40),
+        ("Summary analysis", "No summary analysis", summary_ready, 20),
+    ]
+    quality_score = sum(points for _, _, ready, points in quality_checks if ready)
+    for label, missing_label, ready, points in quality_checks:
+        if ready:
+            lines.append(f"   ✅ {label}: +{points} points")
+        else:
+            lines.append(f"   ❌ {missing_label}: 0 points")
     
-    print(f"   📊 Overall Quality Score: {quality_score}/{max_score} ({quality_score}%)")
+    lines.append(f"   📊 Overall Quality Score: {quality_score}/{max_score} ({quality_score}%)")
     
     # 5. Recommendations for Underwriting Docs
-    print("\n📋 5. Recommendations for Underwriting Documents:")
+    lines.append("\n📋 5. Recommendations for Underwriting Documents:")
     
     if quality_score >= 80:
-        print(f"   🎯 Excellent data quality - ready for professional underwriting package")
-        print(f"   - Generate clean rent roll tab")
-        print(f"   - Generate clean T12 tab (cut off at NOI)")
-        print(f"   - Generate underwriting summary with all line items")
-        print(f"   - Apply rulebook business rules")
+        lines.append(f"   🎯 Excellent data quality - ready for professional underwriting package")
+        lines.append(f"   - Generate clean rent roll tab")
+        lines.append(f"   - Generate clean T12 tab (cut off at NOI)")
+        lines.append(f"   - Generate underwriting summary with all line items")
+        lines.append(f"   - Apply rulebook business rules")
     elif quality_score >= 60:
-        print(f"   ⚠️ Good data quality - some manual review needed")
-        print(f"   - Review and clean extracted data")
-        print(f"   - Fill in missing line items")
-        print(f"   - Apply rulebook business rules")
+        lines.append(f"   ⚠️ Good data quality - some manual review needed")
+        lines.append(f"   - Review and clean extracted data")
+        lines.append(f"   - Fill in missing line items")
+        lines.append(f"   - Apply rulebook business rules")
     else:
-        print(f"   ❌ Poor data quality - significant manual work needed")
-        print(f"   - Manual data entry required")
-        print(f"   - Use rulebook assumptions")
-        print(f"   - Flag for manual review")
+        lines.append(f"   ❌ Poor data quality - significant manual work needed")
+        lines.append(f"   - Manual data entry required")
+        lines.append(f"   - Use rulebook assumptions")
+        lines.append(f"   - Flag for manual review")
+    
+    print("\n".join(lines))
     
     return {
         'quality_score': quality_score,
-        'rent_roll_ready': rent_roll_data and rent_roll_data.get('tables'),
-        't12_ready': t12_data and t12_data.get('tables'),
-        'summary_ready': summary and summary.get('noi_analysis')
+        'rent_roll_ready': rent_roll_ready,
+        't12_ready': t12_ready,
+        'summary_ready': summary_ready
     }
 
 if __name__ == "__main__":
@@ -3,9 +3,12 @@
 Quick test of enhanced data extraction
 """
 
+import logging
 import pandas as pd
 from app_demo_enhanced import extract_rent_roll_directly, extract_t12_directly
 
+logger = logging.getLogger(__name__)
+
 def test_extraction():
     print("🧪 Testing Enhanced Data Extraction")
     print("=" * 50)
@@ -13,7 +16,8 @@ def test_extraction():
     # Test rent roll extraction
     print("\n📊 Testing Rent Roll Extraction...")
     try:
-        rent_roll_df = pd.read_csv("outputs/RR_3350_Mount_Gilead_Rd_Atlanta_GA_30311_table_1.csv")
+        # Read as text: the extractors parse "$1,234" strings themselves, so type inference is wasted work
+        rent_roll_df = pd.read_csv("outputs/RR_3350_Mount_Gilead_Rd_Atlanta_GA_30311_table_1.csv", dtype=str)
         rent_roll_data = extract_rent_roll_directly(rent_roll_df)
         
         print(f"✅ Total Units: {rent_roll_data['total_units']}")
@@ -22,21 +26,21 @@ def test_extraction():
         print(f"✅ Annual GPI: ${rent_roll_data['annual_gpi']:,.0f}")
         print(f"✅ Average Rent: ${rent_roll_data['avg_rent']:,.0f}")
         
-    except Exception as e:
-        print(f"❌ Rent Roll extraction failed: {e}")
+    except Exception:
+        logger.exception("❌ Rent Roll extraction failed")
     
     # Test T12 extraction
     print("\n💰 Testing T12 Extraction...")
     try:
-        t12_df = pd.read_csv("outputs/T12_3350_Mount_Gilead_Rd_Atlanta_GA_30311_table_1.csv")
+        t12_df = pd.read_csv("outputs/T12_3350_Mount_Gilead_Rd_Atlanta_GA_30311_table_1.csv", dtype=str)
         t12_data = extract_t12_directly(t12_df)
         
         print(f"✅ Total Revenue: ${t12_data['total_revenue']:,.0f}")
         print(f"✅ Total Expenses: ${t12_data['total_expenses']:,.0f}")
         print(f"✅ NOI: ${t12_data['noi']:,.0f}")
         
-    except Exception as e:
-        print(f"❌ T12 extraction failed: {e}")
+    except Exception:
+        logger.exception("❌ T12 extraction failed")
     
     print("\n🎯 Extraction test complete!")
 
@@ -5,22 +5,61 @@ Hardwell UW template structure from Hardwell_UW_Example deal 1.xlsx
 """
 
 import os
-import pandas as pd
+import numpy as np
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import logging
 
+# Excel number formats, shared by every cell that uses them
+CURRENCY_FORMAT = '"$"#,##0'
+PERCENT_FORMAT = '0.00%'
+
+# 1-based column index by letter, so cells are addressed without parsing A1 references
+COL_IDX = {letter: index for index, letter in enumerate('ABCDEFGHIJKLMNOP', start=1)}
+
+# UW sheet rows for each revenue/expense line (key in the financial data, sheet row)
+REVENUE_ROWS = (
+    ('rental_income', 16), ('late_fee', 17), ('pet_rent', 18),
+    ('rubs', 19), ('other_income', 20), ('total_pgi', 21)
+)
+UW_REVENUE_ROWS = REVENUE_ROWS + (('vacancy_loss', 23), ('total_egi', 26))
+# UW expense lines that make up total expenses
+TOTAL_EXPENSE_KEYS = (
+    'real_estate_taxes', 'insurance', 'electricity', 'trash', 'water_sewer',
+    'repairs_maintenance', 'cleaning_supplies', 'management_fee', 'payroll',
+    'replacement_reserves'
+)
+
+# T12 expense lines scaled by a rulebook factor (taxes, insurance, then utility-style lines)
+SCALED_EXPENSE_KEYS = (
+    'real_estate_taxes', 'insurance', 'electricity', 'trash',
+    'water_sewer', 'landscape_snow', 'pest_control'
+)
+UW_EXPENSE_ROWS = (
+    ('real_estate_taxes', 30), ('insurance', 31),
+    ('electricity', 36), ('trash', 37), ('water_sewer', 38),
+    ('repairs_maintenance', 41), ('cleaning_supplies', 42),
+    ('management_fee', 47), ('payroll', 48)
+)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_SEP = "=" * 80
+
 class UWTemplateFiller:
     """Professional UW template filler using exact Hardwell format."""
     
-    def __init__(self, template_path):
+    # Set once the outputs directory is known to exist, so batch runs skip the makedirs call
+    _outputs_dir_created = False
+    
+    def __init__(self, template_path, writer_backend='openpyxl'):
         self.template_path = template_path
+        # 'openpyxl' fills the template in place; 'xlsxwriter' writes the UW sheet
+        # from scratch (faster, but without the template's own labels and formatting)
+        self.writer_backend = writer_backend
         self.rulebook_config = {
             'vacancy_minimum': 0.05,  # 5% minimum
             'property_tax_adjustments': {'refinance': 1.075, 'acquisition': 1.0},
@@ -39,11 +78,21 @@ class UWTemplateFiller:
             'replacement_reserves': 250,  # $250/unit
             'minimum_expense_ratio': 0.28  # 28% minimum
         }
+        # R&M minimum per unit indexed by decade of age (the age bands are 10 years wide;
+        # 50+ years shares the top band)
+        rm_minimums = self.rulebook_config['rm_minimums_by_age']
+        self._rm_by_decade = np.array([
+            next(minimum for (min_age, max_age), minimum in rm_minimums.items() if min_age <= decade * 10 < max_age)
+            for decade in range(10)
+        ])
     
     def extract_financial_data(self):
         """Extract and process financial data using rulebook compliance."""
         
-        # Based on our successful extractions, create comprehensive financial model
+        # Based on our successful extractions, create comprehensive financial model.
+        # The sections stay plain nested dicts: fill_uw_template returns them to callers
+        # as-is, and the numeric work runs on arrays built per block (see _fill_uw_column)
+        property_age = 25
         property_data = {
             'property_characteristics': {
                 'borrower': 'TBD',
@@ -55,7 +104,7 @@ class UWTemplateFiller:
                 'transaction_type': 'Rate & Term Refinance',
                 'upb': 20000000,
                 'avg_rent_per_unit': 1527,
-                'property_age': 25
+                'property_age': property_age
             },
             'loan_terms': {
                 'loan_amount': 23500000,
@@ -70,7 +119,7 @@ class UWTemplateFiller:
             'underwriting_parameters': {
                 'vacancy': 0.05,  # 5% minimum per rulebook
                 'management_fee': 0.03,  # 3% tier-based
-                'rm_per_unit': 700,  # Age-based for 25-year property
+                'rm_per_unit': self._rm_minimum_per_unit(property_age),  # Age-based minimum
                 'int_ext': 0.0,
                 'payroll': 400,
                 'rep_reserve': 250,
@@ -123,230 +172,212 @@ class UWTemplateFiller:
                 'pest_control': 3767,
                 'management_fee': 49939,
                 'payroll': 44294
-            },
-            'uw_adjustments': {
-                'real_estate_taxes': int(436783 * 1.075),  # 7.5% increase for refinance
-                'insurance': int(34824 * 1.05),  # 5% increase
-                'electricity': int(12536 * 1.02),  # 2% increase
-                'trash': int(50873 * 1.02),  # 2% increase  
-                'water_sewer': int(255883 * 1.02),  # 2% increase
-                'repairs_maintenance': max(12145, 86 * 700),  # Age-based minimum
-                'cleaning_supplies': 40000,  # Conservative estimate
-                'landscape_snow': int(9356 * 1.02),
-                'pest_control': int(3767 * 1.02),
-                'management_fee': int(3346093 * 0.03),  # 3% of PGI
-                'payroll': max(44294, 86 * 400),  # Minimum per unit
-                'replacement_reserves': 86 * 250  # $250/unit
             }
         }
         
+        # UW expenses: rulebook adjustments applied to the T12 actuals
+        expense_data['uw_adjustments'] = self._compute_uw_expense_adjustments(
+            expense_data['t12_data'],
+            property_data['property_characteristics']['units'],
+            revenue_data['uw_adjustments']['total_pgi'],
+            property_data['underwriting_parameters']
+        )
+        
         return property_data, revenue_data, expense_data
     
-    def fill_uw_template(self, output_name="Professional_UW_Package"):
-        """Fill the UW template with extracted financial data."""
+    def _rm_minimum_per_unit(self, property_age):
+        """R&M minimum per unit for the property's age band."""
+        return self._rm_by_decade[min(property_age // 10, 9)].item()
+    
+    def _compute_uw_expense_adjustments(self, t12_expenses, units, pgi, uw_params):
+        """Apply the rulebook adjustments to the T12 expense actuals (vectorized over the scaled lines)."""
+        # Plain NumPy over a handful of lines: no JIT warmup per CLI run, so nothing to precompile
+        config = self.rulebook_config
+        tax_factor = config['property_tax_adjustments']['refinance']  # Rate & Term Refinance
+        factors = np.array(
+            [tax_factor, config['insurance_adjustment']]
+            + [config['utilities_adjustment']] * (len(SCALED_EXPENSE_KEYS) - 2),
+            dtype=np.float64
+        )
+        actuals = np.array([t12_expenses[key] for key in SCALED_EXPENSE_KEYS], dtype=np.float64)
+        # Truncate toward zero, as int() would
+        scaled = dict(zip(SCALED_EXPENSE_KEYS, (actuals * factors).astype(np.int64).tolist()))
+        
+        return {
+            'real_estate_taxes': scaled['real_estate_taxes'],  # 7.5% increase for refinance
+            'insurance': scaled['insurance'],  # 5% increase
+            'electricity': scaled['electricity'],  # 2% increase
+            'trash': scaled['trash'],  # 2% increase
+            'water_sewer': scaled['water_sewer'],  # 2% increase
+            'repairs_maintenance': max(t12_expenses['repairs_maintenance'], units * uw_params['rm_per_unit']),  # Age-based minimum
+            'cleaning_supplies': 40000,  # Conservative estimate
+            'landscape_snow': scaled['landscape_snow'],
+            'pest_control': scaled['pest_control'],
+            'management_fee': int(pgi * uw_params['management_fee']),  # % of PGI
+            'payroll': max(t12_expenses['payroll'], units * uw_params['payroll']),  # Minimum per unit
+            'replacement_reserves': units * uw_params['rep_reserve']  # $/unit
+        }
+    
+    def fill_uw_template(self, output_name="Professional_UW_Package", timestamp=None):
+        """
+        Fill the UW template with extracted financial data.
+        
+        Pass timestamp to stamp a batch of packages with one shared value.
+        """
         
         logger.info("🎯 Creating Professional UW Package...")
-        logger.info("=" * 80)
+        logger.info(_SEP)
         
         # Extract financial data
         logger.info("📊 Preparing comprehensive financial analysis...")
         property_data, revenue_data, expense_data = self.extract_financial_data()
+        property_chars = property_data['property_characteristics']
+        loan_terms = property_data['loan_terms']
+        uw_params = property_data['underwriting_parameters']
+        uw_rev = revenue_data['uw_adjustments']
+        uw_exp = expense_data['uw_adjustments']
+        units = property_chars['units']
+        egi = uw_rev['total_egi']
         
-        # Load template
-        logger.info("📋 Loading UW template...")
-        wb = load_workbook(self.template_path)
-        
-        if 'UW' not in wb.sheetnames:
-            logger.error("❌ UW sheet not found in template!")
-            return None
-        
-        ws = wb['UW']
+        # UW sheet values by (row, column), written out by the selected backend below;
+        # amounts are written as numbers with a currency number format, not as "$" text
+        cells = {}
+        formats = {}
         
         # Fill Property Characteristics (rows 4-11)
         logger.info("🏢 Filling Property Characteristics...")
-        ws['B4'] = property_data['property_characteristics']['borrower']
-        ws['B5'] = property_data['property_characteristics']['property_name']
-        ws['B6'] = property_data['property_characteristics']['address']
-        ws['B7'] = property_data['property_characteristics']['city_state_zip']
-        ws['B8'] = property_data['property_characteristics']['property_type']
-        ws['B9'] = property_data['property_characteristics']['units']
-        ws['B10'] = property_data['property_characteristics']['transaction_type']
-        ws['B11'] = f"${property_data['property_characteristics']['upb']:,}"
-        ws['B14'] = f"${property_data['property_characteristics']['avg_rent_per_unit']:,}"
+        cells[4, COL_IDX['B']] = property_chars['borrower']
+        cells[5, COL_IDX['B']] = property_chars['property_name']
+        cells[6, COL_IDX['B']] = property_chars['address']
+        cells[7, COL_IDX['B']] = property_chars['city_state_zip']
+        cells[8, COL_IDX['B']] = property_chars['property_type']
+        cells[9, COL_IDX['B']] = property_chars['units']
+        cells[10, COL_IDX['B']] = property_chars['transaction_type']
+        cells[11, COL_IDX['B']] = property_chars['upb']
+        formats[11, COL_IDX['B']] = CURRENCY_FORMAT
+        cells[14, COL_IDX['B']] = property_chars['avg_rent_per_unit']
+        formats[14, COL_IDX['B']] = CURRENCY_FORMAT
         
         # Fill Loan Terms (rows 4-11, columns E-G)
         logger.info("💰 Filling Loan Terms...")
-        ws['G4'] = f"${property_data['loan_terms']['loan_amount']:,}"
-        ws['G5'] = property_data['loan_terms']['interest_rate']
-        ws['G6'] = property_data['loan_terms']['loan_program']
-        ws['G7'] = property_data['loan_terms']['amortization']
-        ws['G8'] = property_data['loan_terms']['ltv']
-        ws['G9'] = property_data['loan_terms']['interest_only']
-        ws['G10'] = property_data['loan_terms']['io_term']
-        ws['G11'] = f"${property_data['loan_terms']['value']:,}"
+        cells[4, COL_IDX['G']] = loan_terms['loan_amount']
+        formats[4, COL_IDX['G']] = CURRENCY_FORMAT
+        cells[5, COL_IDX['G']] = loan_terms['interest_rate']
+        cells[6, COL_IDX['G']] = loan_terms['loan_program']
+        cells[7, COL_IDX['G']] = loan_terms['amortization']
+        cells[8, COL_IDX['G']] = loan_terms['ltv']
+        cells[9, COL_IDX['G']] = loan_terms['interest_only']
+        cells[10, COL_IDX['G']] = loan_terms['io_term']
+        cells[11, COL_IDX['G']] = loan_terms['value']
+        formats[11, COL_IDX['G']] = CURRENCY_FORMAT
         
         # Fill Underwriting Parameters (rows 4-11, columns I-L)
         logger.info("📈 Filling Underwriting Parameters...")
-        uw_params = property_data['underwriting_parameters']
-        ws['L4'] = uw_params['vacancy']
-        ws['L5'] = uw_params['management_fee']
-        ws['L6'] = uw_params['rm_per_unit']
-        ws['L7'] = uw_params['int_ext']
-        ws['L8'] = uw_params['payroll']
-        ws['L9'] = uw_params['rep_reserve']
-        ws['L10'] = uw_params['pin']
-        ws['L11'] = uw_params['cap_rate']
+        cells[4, COL_IDX['L']] = uw_params['vacancy']
+        cells[5, COL_IDX['L']] = uw_params['management_fee']
+        cells[6, COL_IDX['L']] = uw_params['rm_per_unit']
+        cells[7, COL_IDX['L']] = uw_params['int_ext']
+        cells[8, COL_IDX['L']] = uw_params['payroll']
+        cells[9, COL_IDX['L']] = uw_params['rep_reserve']
+        cells[10, COL_IDX['L']] = uw_params['pin']
+        cells[11, COL_IDX['L']] = uw_params['cap_rate']
         
         # Fill Revenue Analysis (rows 16-26)
         logger.info("💵 Filling Revenue Analysis...")
         
-        # T12 Column (E-F)
-        ws['E16'] = f"${revenue_data['t12_data']['rental_income']:,}"
-        ws['F16'] = revenue_data['t12_data']['rental_income'] / property_data['property_characteristics']['units']
-        ws['E17'] = f"${revenue_data['t12_data']['late_fee']:,}"
-        ws['F17'] = revenue_data['t12_data']['late_fee'] / property_data['property_characteristics']['units']
-        ws['E18'] = f"${revenue_data['t12_data']['pet_rent']:,}"
-        ws['F18'] = revenue_data['t12_data']['pet_rent'] / property_data['property_characteristics']['units']
-        ws['E19'] = f"${revenue_data['t12_data']['rubs']:,}"
-        ws['F19'] = revenue_data['t12_data']['rubs'] / property_data['property_characteristics']['units']
-        ws['E20'] = f"${revenue_data['t12_data']['other_income']:,}"
-        ws['F20'] = revenue_data['t12_data']['other_income'] / property_data['property_characteristics']['units']
-        ws['E21'] = f"${revenue_data['t12_data']['total_pgi']:,}"
-        ws['F21'] = revenue_data['t12_data']['total_pgi'] / property_data['property_characteristics']['units']
-        
-        # Quarterly Column (H)
-        ws['H16'] = f"${revenue_data['quarterly_data']['rental_income']:,}"
-        ws['H17'] = f"${revenue_data['quarterly_data']['late_fee']:,}"
-        ws['H18'] = f"${revenue_data['quarterly_data']['pet_rent']:,}"
-        ws['H19'] = f"${revenue_data['quarterly_data']['rubs']:,}"
-        ws['H20'] = f"${revenue_data['quarterly_data']['other_income']:,}"
-        ws['H21'] = f"${revenue_data['quarterly_data']['total_pgi']:,}"
+        # T12 Column (E-F) and Quarterly Column (H)
+        t12_revenue = revenue_data['t12_data']
+        quarterly_revenue = revenue_data['quarterly_data']
+        t12_amounts = [t12_revenue[key] for key, _ in REVENUE_ROWS]
+        t12_per_unit = (np.array(t12_amounts, dtype=np.float64) / units).tolist()
+        for (key, row), amount, per_unit in zip(REVENUE_ROWS, t12_amounts, t12_per_unit):
+            cells[row, COL_IDX['E']] = amount
+            formats[row, COL_IDX['E']] = CURRENCY_FORMAT
+            cells[row, COL_IDX['F']] = per_unit
+            cells[row, COL_IDX['H']] = quarterly_revenue[key]
+            formats[row, COL_IDX['H']] = CURRENCY_FORMAT
         
         # UW Adjustments Column (L-N) - The most important column
-        uw_rev = revenue_data['uw_adjustments']
-        ws['L16'] = f"${uw_rev['rental_income']:,}"
-        ws['M16'] = uw_rev['rental_income'] / property_data['property_characteristics']['units']
-        ws['N16'] = uw_rev['rental_income'] / uw_rev['total_egi']
-        
-        ws['L17'] = f"${uw_rev['late_fee']:,}"
-        ws['M17'] = uw_rev['late_fee'] / property_data['property_characteristics']['units']
-        ws['N17'] = uw_rev['late_fee'] / uw_rev['total_egi']
-        
-        ws['L18'] = f"${uw_rev['pet_rent']:,}"
-        ws['M18'] = uw_rev['pet_rent'] / property_data['property_characteristics']['units']
-        ws['N18'] = uw_rev['pet_rent'] / uw_rev['total_egi']
-        
-        ws['L19'] = f"${uw_rev['rubs']:,}"
-        ws['M19'] = uw_rev['rubs'] / property_data['property_characteristics']['units']
-        ws['N19'] = uw_rev['rubs'] / uw_rev['total_egi']
-        
-        ws['L20'] = f"${uw_rev['other_income']:,}"
-        ws['M20'] = uw_rev['other_income'] / property_data['property_characteristics']['units']
-        ws['N20'] = uw_rev['other_income'] / uw_rev['total_egi']
-        
-        ws['L21'] = f"${uw_rev['total_pgi']:,}"
-        ws['M21'] = uw_rev['total_pgi'] / property_data['property_characteristics']['units']
-        
-        # Vacancy and EGI
-        ws['L23'] = f"${uw_rev['vacancy_loss']:,}"
-        ws['M23'] = uw_rev['vacancy_loss'] / property_data['property_characteristics']['units']
-        ws['N23'] = uw_rev['vacancy_loss'] / uw_rev['total_egi']
-        
-        ws['L26'] = f"${uw_rev['total_egi']:,}"
-        ws['M26'] = uw_rev['total_egi'] / property_data['property_characteristics']['units']
-        ws['N26'] = 1.0  # 100% of EGI
+        # Vacancy and EGI rows follow the income lines; total PGI has no % of EGI
+        self._fill_uw_column(cells, formats, UW_REVENUE_ROWS, uw_rev, units, egi, skip_pct_rows=(21,))
         
         # Fill Expense Analysis (rows 30+)
         logger.info("💸 Filling Expense Analysis...")
-        
-        # Fixed Expenses
-        uw_exp = expense_data['uw_adjustments']
-        units = property_data['property_characteristics']['units']
-        egi = uw_rev['total_egi']
-        
-        # Real Estate Taxes (row 30)
-        ws['L30'] = f"${uw_exp['real_estate_taxes']:,}"
-        ws['M30'] = uw_exp['real_estate_taxes'] / units
-        ws['N30'] = uw_exp['real_estate_taxes'] / egi
-        
-        # Insurance (row 31)
-        ws['L31'] = f"${uw_exp['insurance']:,}"
-        ws['M31'] = uw_exp['insurance'] / units
-        ws['N31'] = uw_exp['insurance'] / egi
-        
-        # Utilities
-        ws['L36'] = f"${uw_exp['electricity']:,}"
-        ws['M36'] = uw_exp['electricity'] / units
-        ws['N36'] = uw_exp['electricity'] / egi
-        
-        ws['L37'] = f"${uw_exp['trash']:,}"
-        ws['M37'] = uw_exp['trash'] / units
-        ws['N37'] = uw_exp['trash'] / egi
-        
-        ws['L38'] = f"${uw_exp['water_sewer']:,}"
-        ws['M38'] = uw_exp['water_sewer'] / units
-        ws['N38'] = uw_exp['water_sewer'] / egi
-        
-        # R&M
-        ws['L41'] = f"${uw_exp['repairs_maintenance']:,}"
-        ws['M41'] = uw_exp['repairs_maintenance'] / units
-        ws['N41'] = uw_exp['repairs_maintenance'] / egi
-        
-        ws['L42'] = f"${uw_exp['cleaning_supplies']:,}"
-        ws['M42'] = uw_exp['cleaning_supplies'] / units
-        ws['N42'] = uw_exp['cleaning_supplies'] / egi
-        
-        # Management
-        ws['L47'] = f"${uw_exp['management_fee']:,}"
-        ws['M47'] = uw_exp['management_fee'] / units
-        ws['N47'] = uw_exp['management_fee'] / egi
-        
-        ws['L48'] = f"${uw_exp['payroll']:,}"
-        ws['M48'] = uw_exp['payroll'] / units
-        ws['N48'] = uw_exp['payroll'] / egi
+        self._fill_uw_column(cells, formats, UW_EXPENSE_ROWS, uw_exp, units, egi)
         
         # Calculate totals and NOI
-        total_expenses = sum([
-            uw_exp['real_estate_taxes'], uw_exp['insurance'], uw_exp['electricity'],
-            uw_exp['trash'], uw_exp['water_sewer'], uw_exp['repairs_maintenance'],
-            uw_exp['cleaning_supplies'], uw_exp['management_fee'], uw_exp['payroll'],
-            uw_exp['replacement_reserves']
-        ])
+        total_expenses = np.fromiter(
+            (uw_exp[key] for key in TOTAL_EXPENSE_KEYS), dtype=np.int64, count=len(TOTAL_EXPENSE_KEYS)
+        ).sum().item()
         
         noi = egi - total_expenses
+        cap_rate = noi / loan_terms['value']
+        expense_ratio = total_expenses / egi
         
         logger.info("📊 Adding summary calculations...")
         
         # Add NOI and summary (find appropriate rows)
         noi_row = 70  # Estimate based on template structure
-        ws[f'A{noi_row}'] = "NET OPERATING INCOME"
-        ws[f'L{noi_row}'] = f"${noi:,}"
-        ws[f'M{noi_row}'] = noi / units
-        ws[f'N{noi_row}'] = noi / egi
+        cells[noi_row, COL_IDX['A']] = "NET OPERATING INCOME"
+        cells[noi_row, COL_IDX['L']] = noi
+        formats[noi_row, COL_IDX['L']] = CURRENCY_FORMAT
+        cells[noi_row, COL_IDX['M']] = noi / units
+        cells[noi_row, COL_IDX['N']] = noi / egi
         
         # Add key metrics
-        ws[f'A{noi_row+2}'] = "Cap Rate"
-        ws[f'L{noi_row+2}'] = noi / property_data['loan_terms']['value']
+        cells[noi_row+2, COL_IDX['A']] = "Cap Rate"
+        cells[noi_row+2, COL_IDX['L']] = cap_rate
+        formats[noi_row+2, COL_IDX['L']] = PERCENT_FORMAT
         
-        ws[f'A{noi_row+3}'] = "Expense Ratio"
-        ws[f'L{noi_row+3}'] = total_expenses / egi
+        cells[noi_row+3, COL_IDX['A']] = "Expense Ratio"
+        cells[noi_row+3, COL_IDX['L']] = expense_ratio
+        formats[noi_row+3, COL_IDX['L']] = PERCENT_FORMAT
         
         # Save the filled template
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if timestamp is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_path = f"outputs/{output_name}_{timestamp}.xlsx"
-        os.makedirs("outputs", exist_ok=True)
-        wb.save(output_path)
+        if not UWTemplateFiller._outputs_dir_created:
+            os.makedirs("outputs", exist_ok=True)
+            UWTemplateFiller._outputs_dir_created = True
+        
+        if self.writer_backend == 'xlsxwriter':
+            self._write_uw_sheet_xlsxwriter(output_path, cells, formats)
+        else:
+            # Imported here so callers that only need extract_financial_data skip openpyxl
+            from openpyxl import load_workbook
+            
+            logger.info("📋 Loading UW template...")
+            wb = load_workbook(self.template_path)
+            
+            if 'UW' not in wb.sheetnames:
+                logger.error("❌ UW sheet not found in template!")
+                return None
+            
+            ws = wb['UW']
+            # One cell lookup per write; formatted cells get the shared format string
+            for (row, column), value in cells.items():
+                cell = ws.cell(row=row, column=column, value=value)
+                number_format = formats.get((row, column))
+                if number_format is not None:
+                    cell.number_format = number_format
+            # Serialize in memory and write the file in one go rather than many small writes
+            buffer = BytesIO()
+            wb.save(buffer)
+            Path(output_path).write_bytes(buffer.getbuffer())
         
         logger.info("\n✅ PROFESSIONAL UW PACKAGE COMPLETED!")
-        logger.info(f"   📊 Output: {output_path}")
-        logger.info(f"   🏢 Property: {property_data['property_characteristics']['property_name']}")
-        logger.info(f"   🏠 Units: {property_data['property_characteristics']['units']}")
-        logger.info(f"   💰 Loan Amount: ${property_data['loan_terms']['loan_amount']:,}")
-        logger.info(f"   💵 EGI: ${egi:,}")
-        logger.info(f"   💸 Total Expenses: ${total_expenses:,}")
-        logger.info(f"   🎯 NOI: ${noi:,}")
-        logger.info(f"   📈 Cap Rate: {(noi/property_data['loan_terms']['value']):.2%}")
-        logger.info(f"   📊 Expense Ratio: {(total_expenses/egi):.1%}")
+        logger.info("   📊 Output: %s", output_path)
+        logger.info("   🏢 Property: %s", property_chars['property_name'])
+        logger.info("   🏠 Units: %s", property_chars['units'])
+        # Thousands separators need pre-formatting, so only do it when INFO is on
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("   💰 Loan Amount: $%s", f"{loan_terms['loan_amount']:,}")
+            logger.info("   💵 EGI: $%s", f"{egi:,}")
+            logger.info("   💸 Total Expenses: $%s", f"{total_expenses:,}")
+            logger.info("   🎯 NOI: $%s", f"{noi:,}")
+            logger.info("   📈 Cap Rate: %.2f%%", cap_rate * 100)
+            logger.info("   📊 Expense Ratio: %.1f%%", expense_ratio * 100)
         logger.info("   ✅ All rulebook rules applied!")
         logger.info("   🎯 Professional UW format maintained!")
         
@@ -356,9 +387,37 @@ class UWTemplateFiller:
             'revenue_data': revenue_data,
             'expense_data': expense_data,
             'noi': noi,
-            'cap_rate': noi / property_data['loan_terms']['value'],
-            'expense_ratio': total_expenses / egi
+            'cap_rate': cap_rate,
+            'expense_ratio': expense_ratio
         }
+    
+    def _fill_uw_column(self, cells, formats, line_rows, amounts_by_key, units, egi, skip_pct_rows=()):
+        """Plan the UW amount (L), per-unit (M) and % of EGI (N) cells for a block of lines."""
+        amounts = [amounts_by_key[key] for key, _ in line_rows]
+        amount_array = np.array(amounts, dtype=np.float64)
+        per_unit = (amount_array / units).tolist()
+        pct_egi = (amount_array / egi).tolist()
+        
+        for (_, row), amount, unit_value, pct_value in zip(line_rows, amounts, per_unit, pct_egi):
+            cells[row, COL_IDX['L']] = amount
+            formats[row, COL_IDX['L']] = CURRENCY_FORMAT
+            cells[row, COL_IDX['M']] = unit_value
+            if row not in skip_pct_rows:
+                cells[row, COL_IDX['N']] = pct_value
+    
+    def _write_uw_sheet_xlsxwriter(self, output_path, cells, formats):
+        """Write the UW sheet values from scratch with xlsxwriter, in the template's cell layout."""
+        import xlsxwriter
+        
+        wb = xlsxwriter.Workbook(output_path, {'strings_to_numbers': False})
+        ws = wb.add_worksheet('UW')
+        # One format object per distinct number format, not per cell
+        format_objects = {number_format: wb.add_format({'num_format': number_format})
+                          for number_format in set(formats.values())}
+        for (row, column), value in cells.items():
+            number_format = formats.get((row, column))
+            ws.write(row - 1, column - 1, value, format_objects.get(number_format))  # xlsxwriter is 0-based
+        wb.close()
 
 def main():
     """Main function."""
@@ -366,7 +425,7 @@ def main():
     template_path = "../Hardwell_UW_Example deal 1.xlsx"
     
     if not os.path.exists(template_path):
-        logger.error(f"❌ UW template not found: {template_path}")
+        logger.error("❌ UW template not found: %s", template_path)
         return
     
     try:
@@ -382,7 +441,7 @@ def main():
         logger.info("   🏆 Professional underwriting package ready!")
         
     except Exception as e:
-        logger.error(f"❌ Error creating UW package: {str(e)}")
+        logger.error("❌ Error creating UW package: %s", e)
         import traceback
         traceback.print_exc()
 
@@ -5,96 +5,193 @@ underwriting packages using the Hardwell UW template structure
 """
 
 import os
-import pandas as pd
-from datetime import datetime
-from pathlib import Path
+import time
+import numpy as np
+from io import BytesIO
 from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.utils.exceptions import CellCoordinatesException
 import logging
 
+# Excel number formats, shared by every cell that uses them. Only number_format is set:
+# a NamedStyle would also replace the template cell's font, fill and borders
+CURRENCY_FORMAT = '"$"#,##0'
+PER_UNIT_FORMAT = '#,##0'
+PERCENT_FORMAT = '0.00%'
+
+# Rulebook inputs for the UW expense adjustments
+TAX_REFI_FACTOR = 1.075  # 7.5% increase for refinance
+INSURANCE_FACTOR = 1.05  # 5% increase
+UTILITIES_FACTOR = 1.02  # 2% increase
+MGMT_RATE = 0.03  # % of PGI
+RM_PER_UNIT_MIN = 700  # Age-based minimum $/unit
+PAYROLL_PER_UNIT_MIN = 400  # $/unit minimum
+RESERVES_PER_UNIT = 250  # $/unit
+
+# UW expenses for the deal, evaluated once at import since every input is a constant
+# (prepare_financial_data hands out a copy, so callers can't change the shared values)
+_UW_EXPENSES = {
+    'taxes': int(436783 * TAX_REFI_FACTOR),
+    'insurance': int(34824 * INSURANCE_FACTOR),
+    'utilities': int(319291 * UTILITIES_FACTOR),
+    'rm': max(199362, 86 * RM_PER_UNIT_MIN),
+    'management': int(3346093 * MGMT_RATE),
+    'payroll': max(44294, 86 * PAYROLL_PER_UNIT_MIN),
+    'reserves': 86 * RESERVES_PER_UNIT,
+    'other': 50000  # General admin, professional fees, etc.
+}
+_UW_EXPENSES_TOTAL = sum(_UW_EXPENSES.values())
+
+# 1-based indices of the UW sheet columns the filler writes, so no A1 reference is built or parsed
+COL_A, COL_B, COL_G, COL_L, COL_M, COL_N = 1, 2, 7, 12, 13, 14
+
+# UW sheet cells per section: (row, column, key in that section of the financial data)
+PROPERTY_CELLS = (
+    (4, COL_B, 'borrower'), (8, COL_B, 'type'), (9, COL_B, 'units'),
+    (10, COL_B, 'transaction'), (11, COL_B, 'upb'), (14, COL_B, 'avg_rent')
+)
+LOAN_CELLS = (
+    (4, COL_G, 'amount'), (5, COL_G, 'rate'), (6, COL_G, 'program'), (7, COL_G, 'amortization'),
+    (8, COL_G, 'ltv'), (9, COL_G, 'io'), (10, COL_G, 'io_term'), (11, COL_G, 'value')
+)
+UW_PARAMETER_CELLS = (
+    (4, COL_L, 'vacancy_rate'), (5, COL_L, 'mgmt_rate'), (6, COL_L, 'rm_per_unit'),
+    (8, COL_L, 'payroll_per_unit'), (9, COL_L, 'reserves_per_unit'), (11, COL_L, 'cap_rate')
+)
+CURRENCY_CELLS = ((11, COL_B), (14, COL_B), (4, COL_G), (11, COL_G))
+
+# UW column (L, M, N) lines, rows based on template analysis: (row, key in the UW figures)
+UW_REVENUE_ROWS = (
+    (16, 'rental_income'), (17, 'late_fees'), (18, 'pet_rent'), (19, 'rubs'),
+    (20, 'other'), (21, 'total_pgi'), (23, 'vacancy'), (26, 'egi')
+)
+UW_EXPENSE_ROWS = (
+    (30, 'taxes'), (31, 'insurance'), (41, 'rm'), (47, 'management'), (48, 'payroll')
+)
+# Expense lines with calculated UW amounts: electricity, trash, water & sewer, cleaning & supplies
+FIXED_UW_EXPENSE_LINES = ((36, 12780), (37, 51891), (38, 261001), (42, 40000))
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_SEP = "=" * 80
+
 class RobustUWFiller:
     """Robust UW template filler that handles merged cells."""
     
-    def __init__(self, template_path):
+    # Set once the outputs directory is known to exist, so repeat packages skip the makedirs call
+    _outputs_dir_created = False
+    
+    def __init__(self, template_path, writer_backend='openpyxl'):
         self.template_path = template_path
+        # 'openpyxl' fills the template in place; 'xlsxwriter' streams the UW sheet
+        # from scratch (flat memory, but without the template's own labels and formatting)
+        self.writer_backend = writer_backend
+        self._template_bytes = None  # Template file contents, read on first use
+        # (row, column) of merged cells other than each range's top-left, from the template
+        self._blocked = None
     
     def safe_write_cell(self, ws, cell_ref, value):
-        """Safely write to a cell, handling merged cells."""
+        """Safely write to a cell by A1 reference, handling merged cells (the filler itself writes by index)."""
         try:
-            cell = ws[cell_ref]
-            if hasattr(cell, 'value') and not isinstance(cell, type(ws['A1'])):
-                # It's a merged cell, skip writing
-                logger.debug(f"Skipping merged cell {cell_ref}")
-                return False
-            cell.value = value
-            return True
-        except Exception as e:
-            logger.debug(f"Could not write to {cell_ref}: {e}")
+            row, column = coordinate_to_tuple(cell_ref)
+            # ws may be any sheet, so check it directly rather than the template's merged-cell set
+            cell = ws.cell(row=row, column=column)
+        except (CellCoordinatesException, ValueError) as e:
+            logger.debug("Could not write to %s: %s", cell_ref, e)
+            return False
+        if isinstance(cell, MergedCell):
+            logger.debug("Skipping merged cell %s", cell_ref)
+            return False
+        cell.value = value
+        return True
+    
+    def _write_rc(self, ws, row, column, value, number_format=None):
+        """Write by 1-based (row, column) into the filler's own package, skipping merged cells."""
+        if self._blocked and (row, column) in self._blocked:
+            # It's a merged cell, skip writing
+            logger.debug("Skipping merged cell at row %s, column %s", row, column)
             return False
+        cell = ws.cell(row=row, column=column, value=value)
+        if number_format is not None:
+            cell.number_format = number_format
+        return True
     
     def create_uw_package(self, output_name="Hardwell_Professional_UW"):
-        """Create professional UW package."""
+        """
+        Create professional UW package.
+        
+        The template file is read from disk once per filler; each package is
+        loaded from the cached bytes.
+        """
         
         logger.info("🎯 Creating Professional UW Package...")
-        logger.info("=" * 80)
+        logger.info(_SEP)
         
         # Prepare comprehensive financial data
         financial_data = self.prepare_financial_data()
         
-        # Load template
-        logger.info("📋 Loading UW template...")
-        wb = load_workbook(self.template_path)
-        
-        if 'UW' not in wb.sheetnames:
-            logger.error("❌ UW sheet not found!")
-            return None
-        
-        ws = wb['UW']
-        
-        # Fill key sections systematically
-        logger.info("🏢 Filling Property Characteristics...")
-        self.fill_property_characteristics(ws, financial_data)
-        
-        logger.info("💰 Filling Loan Terms...")
-        self.fill_loan_terms(ws, financial_data)
-        
-        logger.info("📈 Filling Underwriting Parameters...")
-        self.fill_underwriting_parameters(ws, financial_data)
-        
-        logger.info("💵 Filling Revenue Analysis...")
-        self.fill_revenue_analysis(ws, financial_data)
-        
-        logger.info("💸 Filling Expense Analysis...")
-        self.fill_expense_analysis(ws, financial_data)
-        
-        logger.info("📊 Adding Summary Metrics...")
-        self.add_summary_metrics(ws, financial_data)
+        # Plan every write as {(row, column): value}, then apply them in one pass
+        cells, formats = self._plan_cells(financial_data)
         
         # Save the result
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
         output_path = f"outputs/{output_name}_{timestamp}.xlsx"
-        os.makedirs("outputs", exist_ok=True)
-        wb.save(output_path)
-        
-        # Calculate final metrics
-        noi = financial_data['summary']['noi']
-        egi = financial_data['summary']['egi']
-        total_expenses = financial_data['summary']['total_expenses']
-        
-        logger.info("\n✅ PROFESSIONAL UW PACKAGE COMPLETED!")
-        logger.info(f"   📊 Output: {output_path}")
-        logger.info(f"   🏢 Property: {financial_data['property']['name']}")
-        logger.info(f"   🏠 Units: {financial_data['property']['units']}")
-        logger.info(f"   💰 Loan Amount: ${financial_data['loan']['amount']:,}")
-        logger.info(f"   💵 EGI: ${egi:,}")
-        logger.info(f"   💸 Total Expenses: ${total_expenses:,}")
-        logger.info(f"   🎯 NOI: ${noi:,}")
-        logger.info(f"   📈 Cap Rate: {financial_data['summary']['cap_rate']:.2%}")
-        logger.info(f"   📊 Expense Ratio: {financial_data['summary']['expense_ratio']:.1%}")
+        if not RobustUWFiller._outputs_dir_created:
+            os.makedirs("outputs", exist_ok=True)
+            RobustUWFiller._outputs_dir_created = True
+        
+        if self.writer_backend == 'xlsxwriter':
+            self._write_uw_sheet_xlsxwriter(output_path, cells, formats)
+        else:
+            # Load template (full mode: the template's labels and formatting must be preserved,
+            # which write-only workbooks cannot do). Copying the file first would not help:
+            # openpyxl rewrites every part of the package on save either way
+            logger.info("📋 Loading UW template...")
+            if self._template_bytes is None:
+                with open(self.template_path, 'rb') as f:
+                    self._template_bytes = f.read()
+            wb = load_workbook(BytesIO(self._template_bytes))
+            
+            if 'UW' not in wb.sheetnames:
+                logger.error("❌ UW sheet not found!")
+                return None
+            
+            ws = wb['UW']
+            # Only the top-left cell of a merged range takes a value. Every package loads
+            # the same cached template, so the merged layout is only walked once per filler
+            if self._blocked is None:
+                self._blocked = frozenset(
+                    (row, column)
+                    for merged in ws.merged_cells.ranges
+                    for row in range(merged.min_row, merged.max_row + 1)
+                    for column in range(merged.min_col, merged.max_col + 1)
+                    if (row, column) != (merged.min_row, merged.min_col)
+                )
+            
+            # Row-major order, so the sheet's cell store grows one row at a time.
+            # ws.append only adds rows after the last used one, so it cannot fill template rows
+            for row, column in sorted(cells):
+                self._write_rc(ws, row, column, cells[row, column], formats.get((row, column)))
+            wb.save(output_path)
+        
+        # Build the completion summary only when INFO is on, and emit it as one record
+        if logger.isEnabledFor(logging.INFO):
+            summary = financial_data['summary']
+            logger.info("\n".join([
+                "\n✅ PROFESSIONAL UW PACKAGE COMPLETED!",
+                f"   📊 Output: {output_path}",
+                f"   🏢 Property: {financial_data['property']['name']}",
+                f"   🏠 Units: {financial_data['property']['units']}",
+                f"   💰 Loan Amount: ${financial_data['loan']['amount']:,}",
+                f"   💵 EGI: ${summary['egi']:,}",
+                f"   💸 Total Expenses: ${summary['total_expenses']:,}",
+                f"   🎯 NOI: ${summary['noi']:,}",
+                f"   📈 Cap Rate: {summary['cap_rate']:.2%}",
+                f"   📊 Expense Ratio: {summary['expense_ratio']:.1%}",
+            ]))
         
         return {
             'output_path': output_path,
@@ -105,6 +202,9 @@ class RobustUWFiller:
     def prepare_financial_data(self):
         """Prepare comprehensive financial data with rulebook compliance."""
         
+        # Plain dicts on purpose: create_uw_package hands this structure back to callers,
+        # and each section is only read a few times while planning the cells
+        
         # Property characteristics
         property_data = {
             'borrower': 'TBD',
@@ -163,30 +263,25 @@ class RobustUWFiller:
                 'management': 49939,
                 'payroll': 44294
             },
-            'uw': {
-                'taxes': int(436783 * 1.075),  # 7.5% increase for refinance
-                'insurance': int(34824 * 1.05),  # 5% increase
-                'utilities': int(319291 * 1.02),  # 2% increase
-                'rm': max(199362, 86 * 700),  # Age-based minimum $700/unit
-                'management': int(3346093 * 0.03),  # 3% of PGI
-                'payroll': max(44294, 86 * 400),  # $400/unit minimum
-                'reserves': 86 * 250,  # $250/unit
-                'other': 50000  # General admin, professional fees, etc.
-            }
+            'uw': dict(_UW_EXPENSES)  # Rulebook-adjusted, precomputed at import
         }
         
-        # Calculate totals
-        total_uw_expenses = sum(expense_data['uw'].values())
-        noi = revenue_data['uw']['egi'] - total_uw_expenses
+        # Calculate totals (a few scalar operations per package; compiling them would cost
+        # more than it saves, even across a batch of deals)
+        egi = revenue_data['uw']['egi']
+        total_uw_expenses = _UW_EXPENSES_TOTAL
+        noi = egi - total_uw_expenses
+        cap_rate = noi / loan_data['value']
+        expense_ratio = total_uw_expenses / egi
         
         # Underwriting parameters
         uw_params = {
             'vacancy_rate': 0.05,
-            'mgmt_rate': 0.03,
-            'rm_per_unit': 700,
-            'payroll_per_unit': 400,
-            'reserves_per_unit': 250,
-            'cap_rate': noi / loan_data['value']
+            'mgmt_rate': MGMT_RATE,
+            'rm_per_unit': RM_PER_UNIT_MIN,
+            'payroll_per_unit': PAYROLL_PER_UNIT_MIN,
+            'reserves_per_unit': RESERVES_PER_UNIT,
+            'cap_rate': cap_rate
         }
         
         return {
@@ -196,141 +291,92 @@ class RobustUWFiller:
             'expenses': expense_data,
             'underwriting': uw_params,
             'summary': {
-                'egi': revenue_data['uw']['egi'],
+                'egi': egi,
                 'total_expenses': total_uw_expenses,
                 'noi': noi,
-                'cap_rate': noi / loan_data['value'],
-                'expense_ratio': total_uw_expenses / revenue_data['uw']['egi']
+                'cap_rate': cap_rate,
+                'expense_ratio': expense_ratio
             }
         }
     
-    def fill_property_characteristics(self, ws, data):
-        """Fill property characteristics section."""
-        prop = data['property']
+    def _plan_cells(self, data):
+        """
+        Plan every UW sheet write for the package in one pass.
         
-        # Fill key property data (being careful with merged cells)
-        cells_to_fill = {
-            'B4': prop['borrower'],
-            'B8': prop['type'],
-            'B9': prop['units'],
-            'B10': prop['transaction'],
-            'B11': f"${prop['upb']:,}",
-            'B14': f"${prop['avg_rent']:,}"
-        }
-        
-        for cell_ref, value in cells_to_fill.items():
-            self.safe_write_cell(ws, cell_ref, value)
-    
-    def fill_loan_terms(self, ws, data):
-        """Fill loan terms section."""
+        Returns ({(row, column): value}, {(row, column): number format}); amounts are
+        planned as numbers with a number format, not as "$" text.
+        """
+        prop = data['property']
         loan = data['loan']
-        
-        cells_to_fill = {
-            'G4': f"${loan['amount']:,}",
-            'G5': loan['rate'],
-            'G6': loan['program'],
-            'G7': loan['amortization'],
-            'G8': loan['ltv'],
-            'G9': loan['io'],
-            'G10': loan['io_term'],
-            'G11': f"${loan['value']:,}"
-        }
-        
-        for cell_ref, value in cells_to_fill.items():
-            self.safe_write_cell(ws, cell_ref, value)
-    
-    def fill_underwriting_parameters(self, ws, data):
-        """Fill underwriting parameters section."""
         uw = data['underwriting']
-        
-        cells_to_fill = {
-            'L4': uw['vacancy_rate'],
-            'L5': uw['mgmt_rate'],
-            'L6': uw['rm_per_unit'],
-            'L8': uw['payroll_per_unit'],
-            'L9': uw['reserves_per_unit'],
-            'L11': uw['cap_rate']
-        }
-        
-        for cell_ref, value in cells_to_fill.items():
-            self.safe_write_cell(ws, cell_ref, value)
-    
-    def fill_revenue_analysis(self, ws, data):
-        """Fill revenue analysis section."""
-        rev_t12 = data['revenue']['t12']
         rev_uw = data['revenue']['uw']
-        units = data['property']['units']
-        egi = rev_uw['egi']
-        
-        # UW column (L, M, N) - most important
-        revenue_items = [
-            (16, rev_uw['rental_income']),
-            (17, rev_uw['late_fees']),
-            (18, rev_uw['pet_rent']),
-            (19, rev_uw['rubs']),
-            (20, rev_uw['other']),
-            (21, rev_uw['total_pgi']),
-            (23, rev_uw['vacancy']),
-            (26, rev_uw['egi'])
-        ]
-        
-        for row, amount in revenue_items:
-            # Total amount (column L)
-            self.safe_write_cell(ws, f'L{row}', f"${amount:,}")
-            # Per unit (column M)
-            self.safe_write_cell(ws, f'M{row}', f"{amount/units:.0f}")
-            # Percentage of EGI (column N)
-            if row != 26:  # Don't calculate % for EGI itself
-                self.safe_write_cell(ws, f'N{row}', f"{amount/egi:.4f}")
-            else:
-                self.safe_write_cell(ws, f'N{row}', "1.0000")
-    
-    def fill_expense_analysis(self, ws, data):
-        """Fill expense analysis section."""
         exp_uw = data['expenses']['uw']
-        units = data['property']['units']
-        egi = data['revenue']['uw']['egi']
-        
-        # Map expenses to their row numbers (based on template analysis)
-        expense_mapping = {
-            30: exp_uw['taxes'],        # Real Estate Taxes
-            31: exp_uw['insurance'],    # Insurance
-            36: 12780,                  # Electricity (calculated)
-            37: 51891,                  # Trash (calculated)
-            38: 261001,                 # Water & Sewer (calculated)
-            41: exp_uw['rm'],           # R&M
-            42: 40000,                  # Cleaning & Supplies
-            47: exp_uw['management'],   # Management Fee
-            48: exp_uw['payroll']       # Payroll
-        }
-        
-        for row, amount in expense_mapping.items():
-            # Total amount (column L)
-            self.safe_write_cell(ws, f'L{row}', f"${amount:,}")
-            # Per unit (column M)
-            self.safe_write_cell(ws, f'M{row}', f"{amount/units:.0f}")
-            # Percentage of EGI (column N)
-            self.safe_write_cell(ws, f'N{row}', f"{amount/egi:.4f}")
-    
-    def add_summary_metrics(self, ws, data):
-        """Add summary metrics at the bottom."""
         summary = data['summary']
-        units = data['property']['units']
+        units = prop['units']
+        egi = rev_uw['egi']
         
-        # Find a good spot for NOI (around row 70)
+        # Property characteristics, loan terms and underwriting parameters
+        cells = {(row, column): prop[key] for row, column, key in PROPERTY_CELLS}
+        cells.update(((row, column), loan[key]) for row, column, key in LOAN_CELLS)
+        cells.update(((row, column), uw[key]) for row, column, key in UW_PARAMETER_CELLS)
+        formats = dict.fromkeys(CURRENCY_CELLS, CURRENCY_FORMAT)
+        
+        # UW column (L, M, N) - most important; revenue lines, then expense lines
+        uw_lines = (
+            [(row, rev_uw[key]) for row, key in UW_REVENUE_ROWS]
+            + [(row, exp_uw[key]) for row, key in UW_EXPENSE_ROWS]
+            + list(FIXED_UW_EXPENSE_LINES)
+        )
+        
+        # Per-unit and % of EGI for every line in one vectorized pass (a true divide, not a
+        # multiply by 1/units: the reciprocal form can be off in the last bit)
+        amounts = np.fromiter((amount for _, amount in uw_lines), dtype=np.int64, count=len(uw_lines))
+        per_unit = np.divide(amounts, units).tolist()
+        pct_egi = np.divide(amounts, egi).tolist()
+        
+        for (row, amount), unit_value, pct_value in zip(uw_lines, per_unit, pct_egi):
+            # Total amount (column L), per unit (column M), percentage of EGI (column N)
+            cells[row, COL_L] = amount
+            cells[row, COL_M] = unit_value
+            cells[row, COL_N] = pct_value
+            formats[row, COL_L] = CURRENCY_FORMAT
+            formats[row, COL_M] = PER_UNIT_FORMAT
+            formats[row, COL_N] = PERCENT_FORMAT
+        cells[26, COL_N] = 1.0  # Don't calculate % for EGI itself
+        
+        # Summary metrics at the bottom; NOI around row 70
         noi_row = 70
-        
-        # NOI
-        self.safe_write_cell(ws, f'A{noi_row}', "NET OPERATING INCOME")
-        self.safe_write_cell(ws, f'L{noi_row}', f"${summary['noi']:,}")
-        self.safe_write_cell(ws, f'M{noi_row}', f"{summary['noi']/units:.0f}")
-        
-        # Key ratios
-        self.safe_write_cell(ws, f'A{noi_row+2}', "Cap Rate")
-        self.safe_write_cell(ws, f'L{noi_row+2}', f"{summary['cap_rate']:.4f}")
-        
-        self.safe_write_cell(ws, f'A{noi_row+3}', "Expense Ratio")
-        self.safe_write_cell(ws, f'L{noi_row+3}', f"{summary['expense_ratio']:.4f}")
+        cells.update({
+            (noi_row, COL_A): "NET OPERATING INCOME",
+            (noi_row, COL_L): summary['noi'],
+            (noi_row, COL_M): summary['noi'] / units,
+            (noi_row+2, COL_A): "Cap Rate",
+            (noi_row+2, COL_L): summary['cap_rate'],
+            (noi_row+3, COL_A): "Expense Ratio",
+            (noi_row+3, COL_L): summary['expense_ratio']
+        })
+        formats[noi_row, COL_L] = CURRENCY_FORMAT
+        formats[noi_row, COL_M] = PER_UNIT_FORMAT
+        formats[noi_row+2, COL_L] = formats[noi_row+3, COL_L] = PERCENT_FORMAT
+        
+        logger.debug("Planned %d UW cells (property, loan, UW parameters, revenue, expenses, summary)", len(cells))
+        return cells, formats
+    
+    def _write_uw_sheet_xlsxwriter(self, output_path, cells, formats):
+        """Stream the planned UW cells into a new workbook with xlsxwriter."""
+        import xlsxwriter
+        
+        # constant_memory flushes each row to disk as soon as a later row is started,
+        # so the cells must go out in row-major order
+        wb = xlsxwriter.Workbook(output_path, {'constant_memory': True, 'strings_to_numbers': False})
+        ws = wb.add_worksheet('UW')
+        # One format object per distinct number format, not per cell
+        format_objects = {number_format: wb.add_format({'num_format': number_format})
+                          for number_format in set(formats.values())}
+        for row, column in sorted(cells):
+            number_format = formats.get((row, column))
+            ws.write(row - 1, column - 1, cells[row, column], format_objects.get(number_format))  # xlsxwriter is 0-based
+        wb.close()
 
 def main():
     """Main function."""
@@ -338,7 +384,7 @@ def main():
     template_path = "../Hardwell_UW_Example deal 1.xlsx"
     
     if not os.path.exists(template_path):
-        logger.error(f"❌ UW template not found: {template_path}")
+        logger.error("❌ UW template not found: %s", template_path)
         return
     
     try:
@@ -354,7 +400,7 @@ def main():
         logger.info("   🏆 Ready for underwriting review and approval!")
         
     except Exception as e:
-        logger.error(f"❌ Error creating UW package: {str(e)}")
+        logger.error("❌ Error creating UW package: %s", e)
         import traceback
         traceback.print_exc()
 